@@ -0,0 +1,104 @@
+import time
+import logging
+import threading
+from airtable_queries import find_one
+
+logger = logging.getLogger(__name__)
+
+
+class EmployeeCache:
+    """In-memory copy of an Airtable employee table, indexed by employee_id.
+
+    The whole table is pulled once and then served from memory until `ttl`
+    seconds have passed. Updates go to Airtable first and then into the local
+    copy (write-through), so readers never see stale values after a write.
+    With a `writer` (WriteBehindQueue) the Airtable write is queued instead.
+    """
+
+    def __init__(self, table, name, key_field="employee_id", ttl=300, writer=None):
+        self.table = table
+        self.name = name
+        self.writer = writer
+        self.key_field = key_field
+        self.ttl = ttl
+        self._records = {}
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _expired(self):
+        return time.monotonic() - self._loaded_at > self.ttl
+
+    def refresh(self):
+        """Reload the full table from Airtable and rebuild the index."""
+        records = self.table.all()
+        index = {}
+        for record in records:
+            key = record["fields"].get(self.key_field)
+            if key is not None:
+                index[key] = record
+                if self.writer:
+                    # Don't let a reload undo writes that are still queued
+                    record["fields"].update(self.writer.pending(self.name, record["id"]))
+        with self._lock:
+            self._records = index
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+        logger.info(f"Loaded {len(index)} records from {self.name}")
+
+    def get(self, employee_id):
+        """Return the Airtable record for employee_id, or None."""
+        with self._lock:
+            if self._expired():
+                self.refresh()
+            record = self._records.get(employee_id)
+            if record is not None:
+                self.hits += 1
+                return record
+            # Unknown id: the employee may have been added since the last load,
+            # ask Airtable for that one record instead of pulling the table again
+            self.misses += 1
+            record = find_one(self.table, self.key_field, employee_id)
+            if record is not None:
+                self._records[employee_id] = record
+            return record
+
+    def update(self, employee_id, fields):
+        """Write fields to Airtable and to the local copy. Returns False if unknown."""
+        with self._lock:
+            record = self.get(employee_id)
+            if record is None:
+                return False
+            if self.writer:
+                self.writer.put(self.name, self.table, record["id"], fields)
+            else:
+                self.table.update(record["id"], fields)
+            record["fields"].update(fields)
+            return True
+
+    def modify(self, employee_id, change):
+        """Like update, with fields = change(current fields) computed under the lock.
+
+        For read-modify-write updates such as counters, so two concurrent
+        callers can't both read the old value.
+        """
+        with self._lock:
+            record = self.get(employee_id)
+            if record is None:
+                return False
+            return self.update(employee_id, change(record["fields"]))
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def stats(self):
+        return {
+            "table": self.name,
+            "records": len(self._records),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
@@ -0,0 +1,107 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def formula_value(value):
+    """Render a Python value as an Airtable formula literal."""
+    if isinstance(value, bool):
+        return "TRUE()" if value else "FALSE()"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{text}'"
+
+
+def field_equals(field, value):
+    """Build a filterByFormula expression matching `field` exactly.
+
+    Values are escaped, so ids coming from URLs or from the LLM can't break
+    out of the string literal and widen the filter.
+    """
+    if "}" in field:
+        raise ValueError(f"Invalid field name: {field}")
+    return f"{{{field}}}={formula_value(value)}"
+
+
+def find_one(table, field, value):
+    """Return the first record where field == value, fetched server-side, or None."""
+    records = table.all(formula=field_equals(field, value), max_records=1)
+    return records[0] if records else None
+
+
+class RecordIndex:
+    """Local map from a business key (e.g. request_id) to the Airtable record id.
+
+    Once a key has been seen, lookups are a single `table.get` instead of a
+    filtered scan. Unknown keys fall back to `find_one` and are remembered.
+    Updates go through `writer` (WriteBehindQueue) when one is given, and
+    reads include the fields still waiting in it.
+    """
+
+    def __init__(self, table, name, key_field, writer=None):
+        self.table = table
+        self.name = name
+        self.key_field = key_field
+        self.writer = writer
+        self._ids = {}
+        self._lock = threading.Lock()
+        self.point_reads = 0
+        self.filtered_reads = 0
+
+    def remember(self, key, record_id):
+        with self._lock:
+            self._ids[key] = record_id
+
+    def record_id(self, key):
+        """Return the Airtable record id for key, looking it up if needed."""
+        with self._lock:
+            record_id = self._ids.get(key)
+        if record_id:
+            return record_id
+        record = self._read(key)
+        return record["id"] if record else None
+
+    def get(self, key):
+        """Return the full record for key, or None."""
+        record = self._read(key)
+        if record and self.writer:
+            record["fields"].update(self.writer.pending(self.name, record["id"]))
+        return record
+
+    def update(self, key, fields):
+        """Update the record for key. Returns False if the key is unknown."""
+        record_id = self.record_id(key)
+        if not record_id:
+            return False
+        if self.writer:
+            self.writer.put(self.name, self.table, record_id, fields)
+        else:
+            self.table.update(record_id, fields)
+        return True
+
+    def _read(self, key):
+        with self._lock:
+            record_id = self._ids.get(key)
+        if record_id:
+            self.point_reads += 1
+            try:
+                return self.table.get(record_id)
+            except Exception as e:
+                # Record deleted or id stale, forget it and search again
+                logger.warning(f"Point read for {key} failed: {e}")
+                with self._lock:
+                    self._ids.pop(key, None)
+        self.filtered_reads += 1
+        record = find_one(self.table, self.key_field, key)
+        if record:
+            self.remember(key, record["id"])
+        return record
+
+    def stats(self):
+        return {
+            "known_ids": len(self._ids),
+            "point_reads": self.point_reads,
+            "filtered_reads": self.filtered_reads,
+        }
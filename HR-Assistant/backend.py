@@ -4,18 +4,26 @@ from dotenv import load_dotenv
 import os
 from agno.tools.file import FileTools
 from agno.tools.calculator import CalculatorTools
-from agno.tools.gmail import GmailTools
 from agno.team import Team
-from agno.storage.postgres import PostgresStorage
 from pyairtable import Table
-from flask import Flask, request, render_template_string, jsonify
+from flask import Flask, request, render_template_string, jsonify, Response, stream_with_context
 from pyngrok import ngrok
 import uuid
+import json
 import threading
 import time
 import logging
 from flask_cors import CORS
 import requests
+from airtable_cache import EmployeeCache
+from airtable_queries import RecordIndex
+from write_behind import WriteBehindQueue
+from intent_router import IntentRouter
+from fast_path import FastPath
+from retell_client import RetellChatClient, RetellError
+from history_policy import HistoryPolicy
+from job_queue import JobQueue
+from startup import Startup
 
 # Set up logging
 # logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -23,6 +31,8 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Agents, tools and storage are built on first use or by the warm-up thread
+startup = Startup()
 
 # Load environment variables
 id= os.getenv("id")
@@ -31,17 +41,43 @@ AIRTABLE_TOKEN = os.getenv("AIRTABLE_API")
 BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 NGROK_AUTH_TOKEN = os.getenv("NGROK_AUTH_TOKEN")
 HR_EMAIL = os.getenv("HR_EMAIL")
+GMAIL_CREDENTIALS_PATH = os.getenv("GMAIL_CREDENTIALS_PATH", r"C:\Users\hp\Downloads\AiAgents-yns\HR-Assistant\client_secret.json")
+# Replaced by the ngrok URL when the service starts
+public_url = os.getenv("PUBLIC_URL", "http://localhost:5000")
 
 # Airtable table configurations
 holiday_table = Table(AIRTABLE_TOKEN, BASE_ID, "employee_holidays")
 project_table = Table(AIRTABLE_TOKEN, BASE_ID, "employee_projects")
 request_table = Table(AIRTABLE_TOKEN, BASE_ID, "holiday_requests")
 
+# Employee tables are read on almost every chat turn, keep them in memory
+CACHE_TTL = int(os.getenv("AIRTABLE_CACHE_TTL", "300"))
+# Updates are queued and sent in batches of 10 off the request path
+airtable_writer = WriteBehindQueue(flush_interval=float(os.getenv("AIRTABLE_FLUSH_INTERVAL", "1.0")))
+holiday_cache = EmployeeCache(holiday_table, "employee_holidays", ttl=CACHE_TTL, writer=airtable_writer)
+project_cache = EmployeeCache(project_table, "employee_projects", ttl=CACHE_TTL, writer=airtable_writer)
+# request_id -> Airtable record id, so approvals don't need a filtered scan
+request_index = RecordIndex(request_table, "holiday_requests", "request_id", writer=airtable_writer)
+
+# Approvals are processed off the request path by a small worker pool
+approval_jobs = JobQueue(workers=int(os.getenv("APPROVAL_WORKERS", "2")))
+
+# Retell chats are kept per voice session and share one pooled HTTP session
+RETELL_API_KEY = os.getenv("RETELL_API_KEY")
+if not RETELL_API_KEY:
+    logger.error("RETELL_API_KEY is not set, /text will return errors until it is")
+retell_client = RetellChatClient(
+    api_key=RETELL_API_KEY,
+    agent_id=os.getenv("RETELL_AGENT_ID", "agent_46b88cf66474b91d090194619b"),
+    idle_timeout=int(os.getenv("RETELL_IDLE_TIMEOUT", "600"))
+)
+
 # Flask app for approval/disapproval
 app = Flask(__name__)
 
 CORS(app, resources={r"/chat": {"origins": "http://localhost:8080"}})
 CORS(app, resources={r"/text": {"origins": "http://localhost:8080"}})
+CORS(app, resources={r"/chat/stream": {"origins": "http://localhost:8080"}})
 
 APPROVAL_PAGE = """
 <!DOCTYPE html>
@@ -77,11 +113,10 @@ APPROVAL_PAGE = """
 def show_request(request_id):
     try:
         # logger.info(f"Attempting to retrieve request with request_id: {request_id}")
-        records = request_table.all(formula=f"{{request_id}}='{request_id}'")
-        if not records:
+        record = request_index.get(request_id)
+        if not record:
             # logger.error(f"No record found for request_id: {request_id}")
             return "Request not found", 404
-        record = records[0]
         fields = record['fields']
         # logger.info(f"Retrieved record: {record}")
         return render_template_string(
@@ -102,22 +137,24 @@ def process_request(request_id):
     try:
         # logger.info(f"Processing request with request_id: {request_id}")
         action = request.form.get('action')
-        records = request_table.all(formula=f"{{request_id}}='{request_id}'")
-        if not records:
+        if not request_index.update(request_id, {'status': action}):
             # logger.error(f"No record found for request_id: {request_id}")
             return "Request not found", 404
-        record = records[0]
-        request_table.update(record['id'], {'status': action})
         # logger.info(f"Updated request {request_id} with status: {action}")
-        # Trigger approval agent to notify employee
-        response = approval_agent.run(f"Process holiday request {request_id} with action {action}", markdown=True)
-        print(response.content)
-        logger.info(f"Approval agent response: {response.content}")
-        return f"Request {action}d successfully. The employee will be notified."
+        # Update the balance and notify the employee in the background
+        job_id = approval_jobs.submit("approval", process_approval_job, request_id, action)
+        return f"Request {action} successfully. The employee will be notified. (job: <a href=\"/jobs/{job_id}\">{job_id}</a>)"
     except Exception as e:
         # logger.error(f"Error processing request {request_id}: {str(e)}")
         return f"Error processing request: {str(e)}", 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = approval_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @app.route('/chat', methods=['POST'])
 def chat_handler():
     try:
@@ -127,20 +164,77 @@ def chat_handler():
         if not message:
             return jsonify({"error": "Missing message"}), 400
 
-        # Call the team agent
-        response = ChatBot_Team.run(message, markdown=True)
+        session_id = data.get("session_id") or str(uuid.uuid4())
+
+        answer = fast_answer(message)
+        if answer:
+            get_history_policy().record(session_id, message, answer)
+            return jsonify({"response": answer, "session_id": session_id})
+
+        # Call the member agent directly if the router is sure, else the team
+        prompt = get_history_policy().build_prompt(session_id, message)
+        response = select_responder(message).run(prompt, markdown=True, session_id=session_id)
+        get_history_policy().record(session_id, message, response.content)
 
-        return jsonify({"response": response.content})
+        return jsonify({"response": response.content, "session_id": session_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream_handler():
+    """Same as /chat, but forwards the Team's events as Server-Sent Events."""
+    data = request.get_json()
+    message = data.get("message") if data else None
+
+    if not message:
+        return jsonify({"error": "Missing message"}), 400
+    session_id = data.get("session_id") or str(uuid.uuid4())
+
+    def generate():
+        started = time.perf_counter()
+        first_token = None
+        try:
+            answer = fast_answer(message)
+            if answer:
+                get_history_policy().record(session_id, message, answer)
+                yield sse_event("message", {"event": "FastPath", "content": answer})
+                yield sse_event("done", {"elapsed": round(time.perf_counter() - started, 3), "session_id": session_id})
+                return
+            responder = select_responder(message)
+            prompt = get_history_policy().build_prompt(session_id, message)
+            reply = []
+            for chunk in responder.run(prompt, markdown=True, session_id=session_id, stream=True, stream_intermediate_steps=True):
+                event = getattr(chunk, "event", "RunResponse")
+                content = getattr(chunk, "content", None)
+                if content and isinstance(content, str):
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                        logger.info(f"/chat/stream first token after {first_token:.2f}s")
+                    reply.append(content)
+                    yield sse_event("message", {"event": event, "content": content})
+                else:
+                    # Tool calls, member delegation, reasoning steps...
+                    yield sse_event("status", {"event": event})
+            get_history_policy().record(session_id, message, "".join(reply))
+            yield sse_event("done", {"elapsed": round(time.perf_counter() - started, 3), "session_id": session_id})
+        except Exception as e:
+            yield sse_event("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @app.route('/text', methods=['POST'])
 def voice_handler():
     try:
         data = request.get_json()
         print(data)
-        print(data.get("transcript"))
 
         transcript = data.get("transcript") 
         print(transcript)
@@ -148,119 +242,97 @@ def voice_handler():
             return jsonify({"error": "Missing transcript"}), 400
         # Optional: customer_name = data.get("customer_name", "User")
 
-        # Step 1: Create Chat Session
-        create_chat_response = requests.post(
-            "https://api.retellai.com/create-chat",
-            headers={
-                "Authorization": f"Bearer key_1501adb94f79644ed8f3f9c0fc51",
-                "Content-Type": "application/json"
-            },
-            json={
-                "agent_id": "agent_46b88cf66474b91d090194619b",
-                "metadata": {}
-            }
-        )
-        print(create_chat_response) #prints response 402, means payment required!!!!!
-        if create_chat_response.status_code != 200:
-            return jsonify({"error": f"Failed to create chat: {create_chat_response.text}"}), 500
-
-        chat_id = create_chat_response.json().get("chat_id")
-        if not chat_id:
-            return jsonify({"error": "No chat_id returned"}), 500
-
-        # Step 2: Send Message
-        RETELL_API_KEY = "key_1501adb94f79644ed8f3f9c0fc51" 
-        completion_response = requests.post(
-            "https://api.retellai.com/create-chat-completion",
-            headers={
-                "Authorization": f"Bearer {RETELL_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "chat_id": chat_id,
-                "content": transcript
-            }
-        )
-
-        if completion_response.status_code != 200:
-            return jsonify({"error": f"Failed to get completion: {completion_response.text}"}), 500
-
-        messages = completion_response.json().get("messages", [])
-        agent_reply = messages[-1]["content"] if messages else "No reply from agent."
+        # The front-end sends back the session_id we returned to keep the same Retell chat
+        session_id = data.get("session_id") or str(uuid.uuid4())
+        try:
+            agent_reply, chat_id = retell_client.send(session_id, transcript)
+        except RetellError as e:
+            # 402 from create-chat means payment required
+            return jsonify({"error": str(e)}), 500
 
         return jsonify({
             "response": agent_reply,
-            "chat_id": chat_id
+            "chat_id": chat_id,
+            "session_id": session_id
         })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-    
+@app.route('/stats')
+def stats():
+    return jsonify({
+        "employee_holidays": holiday_cache.stats(),
+        "employee_projects": project_cache.stats(),
+        "holiday_requests": request_index.stats(),
+        "write_behind": airtable_writer.stats(),
+        "router": intent_router.stats(),
+        "retell_active_chats": retell_client.active_chats(),
+        "history": get_history_policy().stats() if startup.ready.is_set() else None,
+        "approval_jobs": approval_jobs.stats()
+    })
+
+@app.route('/health')
+def health():
+    return jsonify({"status": "ok"})
+
+@app.route('/ready')
+def ready():
+    """200 once the agents, tools and storage are built, 503 while warming up."""
+    report = startup.report()
+    return jsonify(report), 200 if report["ready"] else 503
+
 def start_flask():
     # logger.info("Starting Flask app on port 5001")
     app.run(port=5000)
 
-# Start ngrok and Flask in a separate thread
-ngrok.set_auth_token(NGROK_AUTH_TOKEN)
-public_url = ngrok.connect(5000, bind_tls=True).public_url
-# logger.info(f"ngrok public URL: {public_url}")
-threading.Thread(target=start_flask, daemon=True).start()
-time.sleep(2)  # Wait for Flask to start
-
 # Airtable tool functions
 def get_employee_holiday(employee_id: int):
     """Retrieve employee holiday information from Airtable by employee_id."""
-    records = holiday_table.all()
-    for record in records:
+    record = holiday_cache.get(employee_id)
+    if record:
         fields = record["fields"]
-        if fields.get("employee_id") == employee_id:
-            # logger.info(f"Retrieved holiday data for employee_id: {employee_id}")
-            return {
-                "name": fields.get("full_name"),
-                "email": fields.get("email"),
-                "total": int(fields.get("total_holiday_days", 0)),
-                "taken": int(fields.get("holidays_taken", 0)),
-                "last_date": fields.get("last_holiday_taken"),
-            }
+        # logger.info(f"Retrieved holiday data for employee_id: {employee_id}")
+        return {
+            "name": fields.get("full_name"),
+            "email": fields.get("email"),
+            "total": int(fields.get("total_holiday_days", 0)),
+            "taken": int(fields.get("holidays_taken", 0)),
+            "last_date": fields.get("last_holiday_taken"),
+        }
     # logger.warning(f"No holiday data found for employee_id: {employee_id}")
     return None
 
 def get_employee_project(employee_id: int):
     """Retrieve employee project information from Airtable by employee_id."""
-    records = project_table.all()
-    for record in records:
+    record = project_cache.get(employee_id)
+    if record:
         fields = record["fields"]
-        if fields.get("employee_id") == employee_id:
-            # logger.info(f"Retrieved project data for employee_id: {employee_id}")
-            return {
-                "name": fields.get("employee_name"),
-                "project": fields.get("project_name"),
-                "role": fields.get("role"),
-                "start_date": fields.get("start_date"),
-                "end_date": fields.get("end_date"),
-                "next_project": {
-                    "project_name": fields.get("next_project_name", ""),
-                    "start_date": fields.get("next_project_start_date", ""),
-                    "role": fields.get("next_project_role", "")
-                }
+        # logger.info(f"Retrieved project data for employee_id: {employee_id}")
+        return {
+            "name": fields.get("employee_name"),
+            "project": fields.get("project_name"),
+            "role": fields.get("role"),
+            "start_date": fields.get("start_date"),
+            "end_date": fields.get("end_date"),
+            "next_project": {
+                "project_name": fields.get("next_project_name", ""),
+                "start_date": fields.get("next_project_start_date", ""),
+                "role": fields.get("next_project_role", "")
             }
+        }
     # logger.warning(f"No project data found for employee_id: {employee_id}")
     return None
 
 def update_next_project(employee_id: int, project_name: str, start_date: str, role: str):
     """Update the next project information for an employee in Airtable."""
-    records = project_table.all()
-    for record in records:
-        fields = record["fields"]
-        if fields.get("employee_id") == employee_id:
-            project_table.update(record["id"], {
-                "next_project_name": project_name,
-                "next_project_start_date": start_date,
-                "next_project_role": role
-            })
-            # logger.info(f"Updated next project for employee_id: {employee_id}")
-            return True
+    if project_cache.update(employee_id, {
+        "next_project_name": project_name,
+        "next_project_start_date": start_date,
+        "next_project_role": role
+    }):
+        # logger.info(f"Updated next project for employee_id: {employee_id}")
+        return True
     # logger.warning(f"No project record found for employee_id: {employee_id}")
     return False
 
@@ -273,7 +345,7 @@ def create_holiday_request(employee_id: int, requested_days: int):
     request_id = str(uuid.uuid4())
     remaining_days = employee['total'] - employee['taken']
     try:
-        request_table.create({
+        record = request_table.create({
             'request_id': request_id,
             'employee_id': employee_id,
             'full_name': employee['name'],
@@ -282,172 +354,297 @@ def create_holiday_request(employee_id: int, requested_days: int):
             'status': 'pending',
             'request_date': time.strftime('%Y-%m-%d')
         })
+        request_index.remember(request_id, record['id'])
         # logger.info(f"Created holiday request {request_id} for employee_id: {employee_id}")
         return request_id
     except Exception as e:
         # logger.error(f"Failed to create holiday request for employee_id {employee_id}: {str(e)}")
         return None
 
+def get_holiday_request(request_id: str):
+    """Retrieve a holiday request from Airtable by request_id."""
+    record = request_index.get(request_id)
+    if not record:
+        # logger.warning(f"No holiday request found for request_id: {request_id}")
+        return None
+    fields = record["fields"]
+    return {
+        "request_id": request_id,
+        "employee_id": fields.get("employee_id"),
+        "full_name": fields.get("full_name"),
+        "requested_days": fields.get("requested_days"),
+        "status": fields.get("status"),
+    }
+
+def notify_employee(holiday_request, action):
+    """Email the employee the decision on their request. Raises if the email can't be sent."""
+    employee = get_employee_holiday(holiday_request["employee_id"])
+    if not employee or not employee["email"]:
+        raise ValueError(f"No email found for employee {holiday_request['employee_id']}")
+    # Called directly rather than through an agent, so a Gmail error raises and the job is retried
+    return get_gmail_tools().send_email(
+        to=employee["email"],
+        subject=f"Your holiday request has been {action}",
+        body=(
+            f"Hello {holiday_request['full_name'] or employee['name']},\n\n"
+            f"Your request for {holiday_request['requested_days']} holiday day(s) has been {action}.\n\n"
+            f"HR Team"
+        )
+    )
+
+def process_approval_job(job, request_id, action):
+    """Apply an approval decision and notify the employee. Safe to retry."""
+    holiday_request = get_holiday_request(request_id)
+    if not holiday_request:
+        raise ValueError(f"No request found for {request_id}")
+    # The balance update must happen once even if the notification is retried
+    if action == "approved" and not job.state.get("holidays_updated"):
+        if not update_holiday_taken(holiday_request["employee_id"], int(holiday_request["requested_days"])):
+            raise ValueError(f"No holiday record found for employee {holiday_request['employee_id']}")
+        job.state["holidays_updated"] = True
+    result = notify_employee(holiday_request, action)
+    logger.info(f"Notified employee {holiday_request['employee_id']} of {action} request {request_id}")
+    return result
+
 def update_holiday_taken(employee_id: int, additional_days: int):
     """Update holidays_taken for an employee in Airtable."""
-    records = holiday_table.all()
-    for record in records:
-        fields = record["fields"]
-        if fields.get("employee_id") == employee_id:
-            current_taken = int(fields.get("holidays_taken", 0))
-            holiday_table.update(record["id"], {
-                "holidays_taken": current_taken + additional_days,
-                "last_holiday_taken": time.strftime('%Y-%m-%d')
-            })
-            # logger.info(f"Updated holidays_taken for employee_id: {employee_id}")
-            return True
+    # Read and increment under the cache lock, two approvals at once must both count
+    if holiday_cache.modify(employee_id, lambda fields: {
+        "holidays_taken": int(fields.get("holidays_taken", 0)) + additional_days,
+        "last_holiday_taken": time.strftime('%Y-%m-%d')
+    }):
+        # logger.info(f"Updated holidays_taken for employee_id: {employee_id}")
+        return True
     # logger.warning(f"No holiday record found for employee_id: {employee_id}")
     return False
 
+@startup.component("gmail_tools")
+def get_gmail_tools():
+    # Imported here, the Google client libraries are slow to load
+    from agno.tools.gmail import GmailTools
+    # One instance shared by every agent instead of one per agent
+    return GmailTools(credentials_path=GMAIL_CREDENTIALS_PATH)
+
+def holiday_instructions():
+    return """
+        - Your job is to retrieve holiday information or process holiday requests using the employee’s unique ID.
+        - Use `get_employee_holiday` to fetch:
+            - Full name
+            - Email
+            - Total allocated holiday days
+            - Number of holidays taken
+            - Last holiday date
+        - For balance queries:
+            - Calculate: remaining_days = total_holiday_days - holidays_taken
+            - Return the information clearly and professionally.
+        - For holiday requests:
+            - Extract the number of requested days and employee ID from the query.
+            - Use `create_holiday_request` to store the request in Airtable.
+            - Generate a unique request ID and include it in an email to HR ({HR_EMAIL}) with a link to the approval page: {public_url}/request/<request_id>
+            - The email should include the employee’s name, requested days, and remaining balance.
+        - Do not send holiday balance or request confirmation directly to the employee unless explicitly requested.
+        - Only use data from Airtable. Do not guess or hallucinate employee info.
+        - If no matching employee_id is found, respond with: "No holiday data found for the provided employee ID."
+        """.format(HR_EMAIL=HR_EMAIL, public_url=public_url)
+
 # Holiday Agent
-holiday_agent = Agent(
-    name="Holiday Days Calculator Agent",
-    model=Gemini(id=id, api_key=api_key),
-    markdown=True,
-    show_tool_calls=True,
-    tools=[
-        FileTools(),
-        CalculatorTools(),
-        GmailTools(credentials_path=r"C:\Users\hp\Downloads\AiAgents-yns\HR-Assistant\client_secret.json"),
-        get_employee_holiday,
-        create_holiday_request
-    ],
-    description="""
-    An internal company assistant that helps employees check their holiday status and submit holiday requests.
-    This agent queries holiday data from Airtable using employee IDs and creates holiday request entries for HR approval.
-    It sends an email to HR with a link to approve or disapprove the request.
-    """,
-    instructions="""
-    - Your job is to retrieve holiday information or process holiday requests using the employee’s unique ID.
-    - Use `get_employee_holiday` to fetch:
-        - Full name
-        - Email
-        - Total allocated holiday days
-        - Number of holidays taken
-        - Last holiday date
-    - For balance queries:
-        - Calculate: remaining_days = total_holiday_days - holidays_taken
-        - Return the information clearly and professionally.
-    - For holiday requests:
-        - Extract the number of requested days and employee ID from the query.
-        - Use `create_holiday_request` to store the request in Airtable.
-        - Generate a unique request ID and include it in an email to HR ({HR_EMAIL}) with a link to the approval page: {public_url}/request/<request_id>
-        - The email should include the employee’s name, requested days, and remaining balance.
-    - Do not send holiday balance or request confirmation directly to the employee unless explicitly requested.
-    - Only use data from Airtable. Do not guess or hallucinate employee info.
-    - If no matching employee_id is found, respond with: "No holiday data found for the provided employee ID."
-    """.format(HR_EMAIL=HR_EMAIL, public_url=public_url),
-)
+@startup.component("holiday_agent")
+def get_holiday_agent():
+    return Agent(
+        name="Holiday Days Calculator Agent",
+        model=Gemini(id=id, api_key=api_key),
+        markdown=True,
+        show_tool_calls=True,
+        tools=[
+            FileTools(),
+            CalculatorTools(),
+            get_gmail_tools(),
+            get_employee_holiday,
+            create_holiday_request
+        ],
+        description="""
+        An internal company assistant that helps employees check their holiday status and submit holiday requests.
+        This agent queries holiday data from Airtable using employee IDs and creates holiday request entries for HR approval.
+        It sends an email to HR with a link to approve or disapprove the request.
+        """,
+        # Read on every run, the public URL is only known once ngrok is connected
+        instructions=holiday_instructions,
+    )
 
 # Approval Agent
-approval_agent = Agent(
-    name="Holiday Approval Agent",
-    model=Gemini(id=id, api_key=api_key),
-    markdown=True,
-    tools=[
-        GmailTools(credentials_path=r"C:\Users\hp\Downloads\AiAgents-yns\HR-Assistant\client_secret.json"),
-        get_employee_holiday,
-        update_holiday_taken
-    ],
-    description="""
-    An internal agent that processes HR holiday request approvals or disapprovals.
-    It updates the employee's holiday data and notifies the employee of the decision via email.
-    """,
-    instructions="""
-    - Your job is to process holiday request outcomes (approve or disapprove) from the Airtable `holiday_requests` table.
-    - For each request:
-        - Retrieve the request by `request_id` using a filter formula `{{request_id}}='{request_id}'` to get `employee_id`, `full_name`, `requested_days`, and `status`.
-        - Use `get_employee_holiday` to get the employee’s email for notifications using the `employee_id`.
-        - If `status` is 'approved':
-            - Use `update_holiday_taken` to increment `holidays_taken` by `requested_days` and update `last_holiday_taken`.
-            - Send an email to the employee’s email confirming approval.
-        - If `status` is 'disapproved':
-            - Send an email to the employee confirming disapproval.
-        - Include the employee’s name, requested days, and decision in the email.
-    - Do not modify Airtable data unless explicitly required (e.g., for approved requests).
-    - If no matching request_id is found, log: "No request found for the provided ID."
-    """
-)
+@startup.component("approval_agent")
+def get_approval_agent():
+    return Agent(
+        name="Holiday Approval Agent",
+        model=Gemini(id=id, api_key=api_key),
+        markdown=True,
+        tools=[
+            get_gmail_tools(),
+            get_holiday_request,
+            get_employee_holiday,
+            update_holiday_taken
+        ],
+        description="""
+        An internal agent that processes HR holiday request approvals or disapprovals.
+        It updates the employee's holiday data and notifies the employee of the decision via email.
+        """,
+        instructions="""
+        - Your job is to process holiday request outcomes (approve or disapprove) from the Airtable `holiday_requests` table.
+        - For each request:
+            - Retrieve the request with `get_holiday_request` using the `request_id` to get `employee_id`, `full_name`, `requested_days`, and `status`.
+            - Use `get_employee_holiday` to get the employee’s email for notifications using the `employee_id`.
+            - If `status` is 'approved':
+                - Use `update_holiday_taken` to increment `holidays_taken` by `requested_days` and update `last_holiday_taken`.
+                - Send an email to the employee’s email confirming approval.
+            - If `status` is 'disapproved':
+                - Send an email to the employee confirming disapproval.
+            - Include the employee’s name, requested days, and decision in the email.
+        - Do not modify Airtable data unless explicitly required (e.g., for approved requests).
+        - If no matching request_id is found, log: "No request found for the provided ID."
+        """
+    )
 
 # Project Agent
-project_agent = Agent(
-    name="Project Management Agent",
-    model=Gemini(id=id, api_key=api_key),
-    markdown=True,
-    tools=[
-        GmailTools(credentials_path=r"C:\Users\hp\Downloads\AiAgents-yns\HR-Assistant\client_secret.json"),
-        FileTools(),
-        get_employee_project,
-        update_next_project
-    ],
-    description="""
-    An internal company assistant that helps employees view and manage their current and future project assignments.
-    This agent reads employee project data from an Airtable table using the employee’s unique ID.
-    It can also update planned future projects when new information is provided.
-    """,
-    instructions="""
-    - Use the Airtable project table to manage employee project data by `employee_id`.
-    - For each employee, retrieve:
-        - Current project name
-        - Role
-        - Start date
-        - End date
-        - Optional future assignment details under "next project"
-    - Respond to user questions like:
-        - "What is my current project?"
-        - "When does my project end?"
-        - "What’s my role in the project?"
-    - If the user shares new project info, update the employee’s "next_project" fields:
-        - next_project_name
-        - next_project_start_date
-        - next_project_role
-    - Always match using `employee_id` only — do not use names for lookups.
-    - Respond clearly, briefly, and professionally.
-    - If no matching employee_id is found, reply: "No project record found for the provided employee ID."
-    """
-)
+@startup.component("project_agent")
+def get_project_agent():
+    return Agent(
+        name="Project Management Agent",
+        model=Gemini(id=id, api_key=api_key),
+        markdown=True,
+        tools=[
+            get_gmail_tools(),
+            FileTools(),
+            get_employee_project,
+            update_next_project
+        ],
+        description="""
+        An internal company assistant that helps employees view and manage their current and future project assignments.
+        This agent reads employee project data from an Airtable table using the employee’s unique ID.
+        It can also update planned future projects when new information is provided.
+        """,
+        instructions="""
+        - Use the Airtable project table to manage employee project data by `employee_id`.
+        - For each employee, retrieve:
+            - Current project name
+            - Role
+            - Start date
+            - End date
+            - Optional future assignment details under "next project"
+        - Respond to user questions like:
+            - "What is my current project?"
+            - "When does my project end?"
+            - "What’s my role in the project?"
+        - If the user shares new project info, update the employee’s "next_project" fields:
+            - next_project_name
+            - next_project_start_date
+            - next_project_role
+        - Always match using `employee_id` only — do not use names for lookups.
+        - Respond clearly, briefly, and professionally.
+        - If no matching employee_id is found, reply: "No project record found for the provided employee ID."
+        """
+    )
 
-# Chatbot Team Manager
 db_url = "postgresql+psycopg://postgres:ai@localhost:5432/ai"
 
-ChatBot_Team = Team(
-    name="HR Assistant Team Manager",
-    members=[holiday_agent, project_agent, approval_agent],
-    storage=PostgresStorage(
+@startup.component("team_storage")
+def get_team_storage():
+    from agno.storage.postgres import PostgresStorage
+    return PostgresStorage(
         table_name="agent_sessions",
         db_url=db_url,
         auto_upgrade_schema=True
-    ),
-    add_history_to_messages=True,
-    model=Gemini(id=id, api_key=api_key),
-    description="""
-    An intelligent HR Assistant Team Manager responsible for handling employee queries related to holidays, project assignments, and holiday request approvals.
-    This team manager delegates tasks to the most relevant specialist agent:
-    - The **Holiday Agent** manages vacation day tracking and holiday request submissions.
-    - The **Project Agent** manages project assignments, updates, and status inquiries.
-    - The **Approval Agent** processes HR approvals or disapprovals and notifies employees.
-    The manager ensures that every incoming query is handled by the appropriate agent based on the user's intent.
-    """,
-    instructions="""
-    You are an intelligent routing agent that serves as the HR Assistant Team Manager.
-    Your role is to:
-    - Receive user questions related to employee holidays, project assignments, or holiday request approvals.
-    - Analyze the intent of the query.
-    - Forward the query to the correct agent:
-        - If the query relates to holidays, time off, vacation, leave balance, or holiday requests, assign it to the **Holiday Days Calculator Agent**.
-        - If the query relates to project names, roles, start/end dates, or updates, assign it to the **Project Management Agent**.
-        - If the query relates to processing a holiday request approval or disapproval (e.g., from a web hook or internal trigger), assign it to the **Holiday Approval Agent**.
-    - Never try to answer the user directly — your job is to decide which agent is most suited to respond.
-    - If a query could match multiple areas, use your best judgment based on phrasing and specificity.
-    - If no clear match exists, return a polite message suggesting the user clarify their request.
-    Always strive to delegate clearly and efficiently, ensuring accurate responses from the appropriate domain expert.
-    """
-)
+    )
+
+# Chatbot Team Manager
+@startup.component("team")
+def get_team():
+    return Team(
+        name="HR Assistant Team Manager",
+        members=[get_holiday_agent(), get_project_agent(), get_approval_agent()],
+        storage=get_team_storage(),
+        # History is bounded and summarised by history_policy instead of replayed in full
+        add_history_to_messages=False,
+        model=Gemini(id=id, api_key=api_key),
+        description="""
+        An intelligent HR Assistant Team Manager responsible for handling employee queries related to holidays, project assignments, and holiday request approvals.
+        This team manager delegates tasks to the most relevant specialist agent:
+        - The **Holiday Agent** manages vacation day tracking and holiday request submissions.
+        - The **Project Agent** manages project assignments, updates, and status inquiries.
+        - The **Approval Agent** processes HR approvals or disapprovals and notifies employees.
+        The manager ensures that every incoming query is handled by the appropriate agent based on the user's intent.
+        """,
+        instructions="""
+        You are an intelligent routing agent that serves as the HR Assistant Team Manager.
+        Your role is to:
+        - Receive user questions related to employee holidays, project assignments, or holiday request approvals.
+        - Analyze the intent of the query.
+        - Forward the query to the correct agent:
+            - If the query relates to holidays, time off, vacation, leave balance, or holiday requests, assign it to the **Holiday Days Calculator Agent**.
+            - If the query relates to project names, roles, start/end dates, or updates, assign it to the **Project Management Agent**.
+            - If the query relates to processing a holiday request approval or disapproval (e.g., from a web hook or internal trigger), assign it to the **Holiday Approval Agent**.
+        - Never try to answer the user directly — your job is to decide which agent is most suited to respond.
+        - If a query could match multiple areas, use your best judgment based on phrasing and specificity.
+        - If no clear match exists, return a polite message suggesting the user clarify their request.
+        Always strive to delegate clearly and efficiently, ensuring accurate responses from the appropriate domain expert.
+        """
+    )
+
+# Keep the last HISTORY_TURNS exchanges verbatim and summarise the rest
+HISTORY_TURNS = int(os.getenv("HISTORY_TURNS", "6"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1500"))
+
+@startup.component("history_summary_agent")
+def get_history_summary_agent():
+    return Agent(
+        name="History Summary Agent",
+        model=Gemini(id=id, api_key=api_key),
+        instructions=f"""
+        - You maintain a running summary of a conversation between an employee and the HR assistant.
+        - You get the previous summary and the exchanges that are being dropped from the history.
+        - Return the updated summary only, in plain text, at most {HISTORY_TOKEN_BUDGET // 2} tokens.
+        - Keep employee IDs, names, request IDs, numbers of days, dates and decisions exactly as written.
+        """
+    )
+
+def summarize_history(summary, turns):
+    exchanges = "\n".join(f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in turns)
+    response = get_history_summary_agent().run(f"Previous summary:\n{summary or '(none)'}\n\nDropped exchanges:\n{exchanges}")
+    return response.content
+
+@startup.component("history_policy")
+def get_history_policy():
+    return HistoryPolicy(
+        db_url,
+        summarize_history,
+        max_turns=HISTORY_TURNS,
+        token_budget=HISTORY_TOKEN_BUDGET
+    )
+
+# Local routing ahead of the manager: clear-cut messages go straight to the member agent
+intent_router = IntentRouter(min_confidence=float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.7")))
+member_agents = {
+    "holiday": get_holiday_agent,
+    "project": get_project_agent,
+    "approval": get_approval_agent
+}
+
+# Balance and project end-date questions are answered without any LLM call
+fast_path = FastPath(get_employee_holiday, get_employee_project)
+
+def fast_answer(message):
+    """Return a direct answer for a simple lookup, or None for the agents to handle."""
+    result = fast_path.answer(message)
+    if not result:
+        return None
+    intent, answer = result
+    intent_router.record("fast_path")
+    logger.info(f"Answered {intent} on the fast path")
+    return answer
+
+def select_responder(message):
+    """Return the member agent for message, or the Team when routing is ambiguous."""
+    route, confidence = intent_router.route(message)
+    return member_agents[route]() if route else get_team()
 
 # Main interaction loop
 # while True:
@@ -455,15 +652,41 @@ ChatBot_Team = Team(
 #     if user_input.lower() in ["exit", "quit"]:
 #         print("Bot: Goodbye!")
 #         break
-#     response = ChatBot_Team.run(user_input, markdown=True)
+#     response = get_team().run(user_input, markdown=True)
 #     print("Bot:", response.content)
 
 
 
 
 
-try:
-    while True:
-        time.sleep(1)
-except KeyboardInterrupt:
-    print("Shutting down.")
\ No newline at end of file
+def warm_up():
+    global public_url
+    try:
+        ngrok.set_auth_token(NGROK_AUTH_TOKEN)
+        public_url = ngrok.connect(5000, bind_tls=True).public_url
+        startup.mark("ngrok")
+    except Exception as e:
+        # Keep warming up, /ready reports the failure
+        startup.fail("ngrok", e)
+    # logger.info(f"ngrok public URL: {public_url}")
+    for cache in (holiday_cache, project_cache):
+        try:
+            cache.refresh()
+        except Exception as e:
+            logger.error(f"Could not preload {cache.name}: {e}")
+    startup.mark("airtable_cache")
+    startup.warm_up()
+    logger.info(f"Startup report: {startup.report()}")
+
+
+if __name__ == "__main__":
+    # Serve straight away (/health, /ready), agents are built in the background
+    threading.Thread(target=start_flask, daemon=True).start()
+    startup.mark("flask")
+    threading.Thread(target=warm_up, daemon=True).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Shutting down.")
+        airtable_writer.close()
@@ -0,0 +1,69 @@
+import re
+
+EMPLOYEE_ID_PATTERN = re.compile(r"\b(?:employee(?:\s+id)?|emp(?:loyee)?[\s_-]?id|id)\s*(?:is|=|:|#)?\s*(\d+)\b", re.I)
+
+BALANCE_PATTERN = re.compile(
+    r"\b(how many|how much|remaining|left|balance)\b.*\b(holiday|holidays|vacation|leave|days? off|pto)\b"
+    r"|\b(holiday|holidays|vacation|leave|pto)\b.*\b(remaining|left|balance)\b",
+    re.I,
+)
+PROJECT_END_PATTERN = re.compile(
+    r"\b(when|what date|which date)\b.*\bproject\b.*\b(end|ends|finish|finishes|over)\b"
+    r"|\bproject\b.*\bend(ing)? date\b",
+    re.I,
+)
+# Anything that asks for an action or a change goes to the agents
+ACTION_PATTERN = re.compile(
+    r"\b(request|book|take|apply|submit|update|change|next project|approve|email|send)\b", re.I
+)
+
+
+def extract_employee_id(message):
+    match = EMPLOYEE_ID_PATTERN.search(message)
+    return int(match.group(1)) if match else None
+
+
+class FastPath:
+    """Answers the most common read-only HR questions straight from Airtable data.
+
+    Only balance and project end-date lookups that name an employee id are
+    handled here; everything else returns None and goes to the agents.
+    """
+
+    def __init__(self, get_employee_holiday, get_employee_project):
+        self.get_employee_holiday = get_employee_holiday
+        self.get_employee_project = get_employee_project
+
+    def answer(self, message):
+        """Return (intent, answer) for a supported question, or None."""
+        if ACTION_PATTERN.search(message):
+            return None
+        employee_id = extract_employee_id(message)
+        if employee_id is None:
+            return None
+        if BALANCE_PATTERN.search(message):
+            return "holiday_balance", self.holiday_balance(employee_id)
+        if PROJECT_END_PATTERN.search(message):
+            return "project_end", self.project_end(employee_id)
+        return None
+
+    def holiday_balance(self, employee_id):
+        employee = self.get_employee_holiday(employee_id)
+        if not employee:
+            return "No holiday data found for the provided employee ID."
+        remaining = employee["total"] - employee["taken"]
+        answer = (
+            f"**{employee['name']}**, you have **{remaining}** holiday days remaining "
+            f"({employee['taken']} taken out of {employee['total']})."
+        )
+        if employee.get("last_date"):
+            answer += f" Your last holiday was on {employee['last_date']}."
+        return answer
+
+    def project_end(self, employee_id):
+        project = self.get_employee_project(employee_id)
+        if not project:
+            return "No project record found for the provided employee ID."
+        if not project.get("end_date"):
+            return f"**{project['project']}** has no end date recorded yet."
+        return f"Your current project **{project['project']}** ends on **{project['end_date']}**."
@@ -0,0 +1,121 @@
+import json
+import logging
+import threading
+from collections import deque
+from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, DateTime, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1 if text else 0
+
+
+class HistoryPolicy:
+    """Bounded chat history with a rolling summary, stored in Postgres.
+
+    The last `max_turns` exchanges are kept verbatim. Older exchanges, or
+    recent ones that push the history over `token_budget`, are folded into a
+    running summary by `summarize(previous_summary, turns) -> str`. The prompt
+    sent to the model is summary + recent turns + the new message, so its size
+    stays flat however long the session runs.
+    """
+
+    def __init__(self, db_url, summarize, max_turns=6, token_budget=1500,
+                 table_name="hr_chat_history", metrics_window=200, lock_stripes=64):
+        self.summarize = summarize
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.engine = create_engine(db_url)
+        self.table = Table(
+            table_name, MetaData(),
+            Column("session_id", String, primary_key=True),
+            Column("summary", Text, nullable=False, default=""),
+            Column("turns", Text, nullable=False, default="[]"),
+            Column("updated_at", DateTime(timezone=True), server_default=func.now(), onupdate=func.now()),
+        )
+        self.table.create(self.engine, checkfirst=True)
+        # A fixed pool of locks shared by hash, so there is no per-session entry to clean up.
+        # Sessions on the same stripe only wait for each other while a turn is recorded.
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._prompt_tokens = deque(maxlen=metrics_window)
+        self.summarized_turns = 0
+
+    def _session_lock(self, session_id):
+        return self._locks[hash(session_id) % len(self._locks)]
+
+    def load(self, session_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(select(self.table).where(self.table.c.session_id == session_id)).first()
+        if not row:
+            return "", []
+        return row.summary, json.loads(row.turns)
+
+    def save(self, session_id, summary, turns):
+        values = {"session_id": session_id, "summary": summary, "turns": json.dumps(turns)}
+        statement = insert(self.table).values(**values).on_conflict_do_update(
+            index_elements=["session_id"],
+            set_={"summary": summary, "turns": values["turns"], "updated_at": func.now()},
+        )
+        with self.engine.begin() as conn:
+            conn.execute(statement)
+
+    def build_prompt(self, session_id, message):
+        """Return the message to send to the model, with the bounded history in front."""
+        # Waits for a previous turn of this session that is still being recorded
+        with self._session_lock(session_id):
+            summary, turns = self.load(session_id)
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier conversation:\n{summary}")
+        if turns:
+            recent = "\n".join(f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in turns)
+            parts.append(f"Recent conversation:\n{recent}")
+        parts.append(f"Current message:\n{message}" if parts else message)
+        prompt = "\n\n".join(parts)
+        tokens = estimate_tokens(prompt)
+        self._prompt_tokens.append(tokens)
+        logger.info(f"Session {session_id}: prompt ~{tokens} tokens ({len(turns)} recent turns, summary {estimate_tokens(summary)} tokens)")
+        return prompt
+
+    def _history_tokens(self, turns):
+        return sum(estimate_tokens(turn["user"]) + estimate_tokens(turn["assistant"]) for turn in turns)
+
+    def record(self, session_id, message, reply):
+        """Append an exchange in the background so the reply isn't held up by summarising."""
+        lock = self._session_lock(session_id)
+        lock.acquire()
+        threading.Thread(target=self._record, args=(lock, session_id, message, reply), daemon=True).start()
+
+    def _record(self, lock, session_id, message, reply):
+        try:
+            summary, turns = self.load(session_id)
+            turns.append({"user": message, "assistant": reply})
+            overflow = []
+            while turns and (len(turns) > self.max_turns or self._history_tokens(turns) > self.token_budget):
+                overflow.append(turns.pop(0))
+            if overflow:
+                try:
+                    summary = self.summarize(summary, overflow)
+                    self.summarized_turns += len(overflow)
+                except Exception as e:
+                    # Keep the turns rather than losing them if the summariser fails
+                    logger.error(f"History summarisation failed for {session_id}: {e}")
+                    turns = overflow + turns
+            self.save(session_id, summary, turns)
+        except Exception as e:
+            logger.error(f"Failed to record history for {session_id}: {e}")
+        finally:
+            lock.release()
+
+    def stats(self):
+        sizes = list(self._prompt_tokens)
+        return {
+            "turns_measured": len(sizes),
+            "last_prompt_tokens": sizes[-1] if sizes else 0,
+            "avg_prompt_tokens": round(sum(sizes) / len(sizes), 1) if sizes else 0,
+            "max_prompt_tokens": max(sizes) if sizes else 0,
+            "summarized_turns": self.summarized_turns,
+        }
@@ -0,0 +1,84 @@
+import re
+import logging
+import threading
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Keyword -> weight per route. Strong, unambiguous terms weigh more.
+ROUTE_KEYWORDS = {
+    "holiday": {
+        "holiday": 3, "holidays": 3, "vacation": 3, "leave": 2, "time off": 3,
+        "day off": 3, "days off": 3, "pto": 3, "annual leave": 3, "balance": 1,
+        "remaining": 1, "left": 1, "request": 1, "book": 1,
+    },
+    "project": {
+        "project": 3, "projects": 3, "role": 2, "assignment": 2, "assigned": 2,
+        "end date": 2, "start date": 1, "next project": 4, "client": 1, "team": 1,
+        "ends": 1, "starts": 1,
+    },
+    "approval": {
+        "approve": 3, "approved": 3, "disapprove": 4, "disapproved": 4, "reject": 3,
+        "rejected": 3, "process holiday request": 5, "request id": 2,
+    },
+}
+
+UUID_PATTERN = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I)
+
+
+class IntentRouter:
+    """Keyword classifier that picks a Team member without asking the manager LLM.
+
+    `route` returns the member name when the best score is both high enough
+    and clearly ahead of the runner-up, otherwise None so the caller falls
+    back to the Team manager. Every decision is counted in `stats()`.
+    """
+
+    def __init__(self, keywords=ROUTE_KEYWORDS, min_score=3, min_confidence=0.7):
+        self.min_score = min_score
+        self.min_confidence = min_confidence
+        self._patterns = {
+            route: [(re.compile(r"\b" + re.escape(word) + r"\b"), weight) for word, weight in words.items()]
+            for route, words in keywords.items()
+        }
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def scores(self, message):
+        text = message.lower()
+        scores = {
+            route: sum(weight for pattern, weight in patterns if pattern.search(text))
+            for route, patterns in self._patterns.items()
+        }
+        # Approval messages come from the webhook with a request UUID in them
+        if UUID_PATTERN.search(text):
+            scores["approval"] = scores.get("approval", 0) + 2
+        return scores
+
+    def route(self, message):
+        """Return (route or None, confidence) for message."""
+        scores = self.scores(message)
+        best = max(scores, key=scores.get)
+        total = sum(scores.values())
+        confidence = scores[best] / total if total else 0.0
+        if scores[best] < self.min_score or confidence < self.min_confidence:
+            best = None
+        self.record(best or "manager")
+        logger.info(f"Routed to {best or 'manager'} (confidence {confidence:.2f}, scores {scores})")
+        return best, confidence
+
+    def record(self, path):
+        with self._lock:
+            self._counts[path] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        manager = counts.get("manager", 0)
+        return {
+            "paths": counts,
+            "total": total,
+            # Every message that skips the manager saves one LLM call
+            "llm_hops_saved": total - manager,
+        }
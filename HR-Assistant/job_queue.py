@@ -0,0 +1,113 @@
+import time
+import uuid
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    def __init__(self, name, fn, args, max_attempts):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.max_attempts = max_attempts
+        self.status = "queued"
+        self.attempts = 0
+        self.result = None
+        self.error = None
+        # Steps that already succeeded, so a retry doesn't repeat them
+        self.state = {}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """In-process job queue served by a fixed pool of worker threads.
+
+    `submit` returns a job id straight away. A job's function is called as
+    `fn(job, *args)` and is retried with exponential backoff when it raises,
+    up to `max_attempts`. Finished jobs are kept for `keep_finished` seconds
+    so their status can be polled.
+    """
+
+    def __init__(self, workers=2, backoff=2.0, keep_finished=3600):
+        self.backoff = backoff
+        self.keep_finished = keep_finished
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, name, fn, *args, max_attempts=3):
+        job = Job(name, fn, args, max_attempts)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        logger.info(f"Queued job {job.id} ({name})")
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            job.started_at = job.started_at or time.time()
+            job.attempts += 1
+            try:
+                job.result = job.fn(job, *job.args)
+                job.status = "succeeded"
+                job.error = None
+                job.finished_at = time.time()
+                logger.info(f"Job {job.id} ({job.name}) succeeded after {job.attempts} attempt(s)")
+            except Exception as e:
+                job.error = str(e)
+                if job.attempts < job.max_attempts:
+                    job.status = "retrying"
+                    delay = self.backoff * 2 ** (job.attempts - 1)
+                    logger.warning(f"Job {job.id} ({job.name}) failed: {e}, retrying in {delay:.0f}s")
+                    threading.Timer(delay, self._queue.put, args=(job,)).start()
+                else:
+                    job.status = "failed"
+                    job.finished_at = time.time()
+                    logger.error(f"Job {job.id} ({job.name}) failed after {job.attempts} attempts: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"queue_depth": self._queue.qsize(), "jobs": counts}
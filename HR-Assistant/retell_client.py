@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETELL_BASE_URL = "https://api.retellai.com"
+
+
+# create-chat-completion answers these when the chat is unknown or has ended
+CHAT_GONE_STATUSES = (404, 410)
+
+
+class RetellError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetellChatClient:
+    """Keeps one Retell chat per caller and reuses a pooled HTTP session.
+
+    A caller's chat is reused until it has been idle for `idle_timeout`
+    seconds, so the agent keeps the conversation context and we skip the
+    `create-chat` round-trip on every utterance.
+    """
+
+    def __init__(self, api_key, agent_id, idle_timeout=600, timeout=30):
+        self.api_key = api_key
+        self.agent_id = agent_id
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self._chats = {}
+        self._lock = threading.Lock()
+
+    def _post(self, path, payload):
+        if not self.api_key:
+            raise RetellError("RETELL_API_KEY is not set, voice chat is unavailable")
+        response = self.session.post(f"{RETELL_BASE_URL}/{path}", json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RetellError(f"{path} failed ({response.status_code}): {response.text}", response.status_code)
+        return response.json()
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [caller for caller, (_, last) in self._chats.items() if now - last > self.idle_timeout]
+            for caller in expired:
+                del self._chats[caller]
+        if expired:
+            logger.info(f"Dropped {len(expired)} idle Retell chats")
+
+    def create_chat(self):
+        chat_id = self._post("create-chat", {"agent_id": self.agent_id, "metadata": {}}).get("chat_id")
+        if not chat_id:
+            raise RetellError("No chat_id returned")
+        return chat_id
+
+    def chat_id_for(self, caller):
+        """Return the live chat for caller, creating one if needed."""
+        self._expire_idle()
+        with self._lock:
+            entry = self._chats.get(caller)
+        if entry:
+            return entry[0]
+        chat_id = self.create_chat()
+        with self._lock:
+            self._chats[caller] = (chat_id, time.monotonic())
+        return chat_id
+
+    def send(self, caller, content):
+        """Send content in caller's chat and return (reply, chat_id)."""
+        chat_id = self.chat_id_for(caller)
+        try:
+            data = self._post("create-chat-completion", {"chat_id": chat_id, "content": content})
+        except RetellError as e:
+            # Auth, billing and other errors would fail the same way in a new chat
+            if e.status_code not in CHAT_GONE_STATUSES:
+                raise
+            # The chat was ended on Retell's side, start a fresh one once
+            with self._lock:
+                self._chats.pop(caller, None)
+            chat_id = self.chat_id_for(caller)
+            data = self._post("create-chat-completion", {"chat_id": chat_id, "content": content})
+        with self._lock:
+            self._chats[caller] = (chat_id, time.monotonic())
+        messages = data.get("messages", [])
+        reply = messages[-1]["content"] if messages else "No reply from agent."
+        return reply, chat_id
+
+    def active_chats(self):
+        self._expire_idle()
+        with self._lock:
+            return len(self._chats)
@@ -0,0 +1,79 @@
+import time
+import logging
+import threading
+import functools
+
+logger = logging.getLogger(__name__)
+
+
+class Startup:
+    """Tracks how long each part of the service takes to come up.
+
+    Components are declared with `@startup.component(name)`: the factory runs
+    on first use (or during `warm_up`), exactly once even under concurrent
+    requests, and its build time goes into `report()`. The service only
+    reports ready once warm-up is done and nothing is left in `errors`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.errors = {}
+        self.ready = threading.Event()
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        """Record the time since process start for a startup milestone."""
+        self.timings[name] = round(time.perf_counter() - self.started, 3)
+
+    def fail(self, name, error):
+        """Record why a startup step failed, it keeps the service from reporting ready."""
+        self.errors[name] = str(error)
+        logger.error(f"Startup of {name} failed: {error}")
+
+    def component(self, name):
+        def decorator(factory):
+            lock = threading.Lock()
+            instance = []
+
+            @functools.wraps(factory)
+            def get():
+                if instance:
+                    return instance[0]
+                with lock:
+                    if not instance:
+                        began = time.perf_counter()
+                        instance.append(factory())
+                        self.timings[name] = round(time.perf_counter() - began, 3)
+                        # Built on first use after a failed warm-up
+                        self.errors.pop(name, None)
+                        logger.info(f"Built {name} in {self.timings[name]:.2f}s")
+                return instance[0]
+
+            with self._lock:
+                self._components[name] = get
+            return get
+        return decorator
+
+    def warm_up(self, names=None):
+        """Build the given components (all by default) and mark the service ready."""
+        for name, get in list(self._components.items()):
+            if names is not None and name not in names:
+                continue
+            try:
+                get()
+            except Exception as e:
+                # Leave it to be built on first use, and say why it isn't ready
+                self.fail(name, e)
+        self.mark("ready")
+        self.ready.set()
+
+    def report(self):
+        return {
+            "ready": self.ready.is_set() and not self.errors,
+            "warmed_up": self.ready.is_set(),
+            "uptime": round(time.perf_counter() - self.started, 3),
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+        }
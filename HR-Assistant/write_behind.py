@@ -0,0 +1,167 @@
+import time
+import atexit
+import logging
+import threading
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Airtable accepts at most 10 records per batch call and 5 requests/s per base
+AIRTABLE_BATCH_SIZE = 10
+AIRTABLE_MAX_RPS = 5
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _transient(error):
+    """Rate limits, server errors and dropped connections are worth sending again."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class WriteBehindQueue:
+    """Coalesces Airtable record updates and flushes them in batches.
+
+    `put` only records the change and returns. A background thread groups the
+    pending updates per table, merges repeated writes to the same record, and
+    sends them with `batch_update` in chunks of 10, paced under Airtable's rate
+    limit. 429s, 5xx responses and network errors are retried with backoff,
+    and a batch that still fails goes back into the queue for the next flush,
+    so the caches' pending overlay never shows a write that was lost. Only
+    batches Airtable rejects outright (other 4xx) are dropped. Pending writes
+    are flushed on `close()` and at interpreter exit.
+    """
+
+    def __init__(self, flush_interval=1.0, max_retries=5, backoff=1.0):
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._tables = {}
+        self._pending = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._last_call = 0.0
+        self.enqueued = 0
+        self.coalesced = 0
+        self.requests = 0
+        self.retries = 0
+        self.failed = 0
+        self.requeued = 0
+        self._thread = threading.Thread(target=self._run, name="airtable-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, name, table, record_id, fields):
+        """Queue an update of record_id in table. Later writes win per field."""
+        with self._lock:
+            self._tables[name] = table
+            records = self._pending.setdefault(name, {})
+            if record_id in records:
+                records[record_id].update(fields)
+                self.coalesced += 1
+            else:
+                records[record_id] = dict(fields)
+            self.enqueued += 1
+        self._wake.set()
+
+    def pending(self, name, record_id):
+        """Fields queued for record_id that Airtable hasn't received yet."""
+        with self._lock:
+            fields = dict(self._inflight.get(name, {}).get(record_id, {}))
+            fields.update(self._pending.get(name, {}).get(record_id, {}))
+            return fields
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            # Give callers a moment to pile up more writes into the same batch
+            self._stopped.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _throttle(self):
+        wait = 1.0 / AIRTABLE_MAX_RPS - (time.monotonic() - self._last_call)
+        if wait > 0:
+            time.sleep(wait)
+        self._last_call = time.monotonic()
+
+    def _send(self, name, table, batch):
+        """True when sent, False when worth another try later, None when Airtable rejected it."""
+        for attempt in range(self.max_retries + 1):
+            self._throttle()
+            try:
+                self.requests += 1
+                table.batch_update(batch)
+                return True
+            except Exception as e:
+                if not _transient(e):
+                    logger.error(f"Batch update of {len(batch)} records in {name} rejected, dropping it: {e}")
+                    return None
+                if attempt == self.max_retries:
+                    logger.error(f"Batch update of {len(batch)} records in {name} failed, requeued: {e}")
+                    return False
+                self.retries += 1
+                time.sleep(self.backoff * 2 ** attempt)
+        return False
+
+    def _requeue(self, name, batch):
+        with self._lock:
+            records = self._pending.setdefault(name, {})
+            for item in batch:
+                # Anything written since the batch left is newer and wins
+                fields = dict(item["fields"])
+                fields.update(records.get(item["id"], {}))
+                records[item["id"]] = fields
+            self.requeued += len(batch)
+        self._wake.set()
+
+    def flush(self):
+        """Send everything queued so far. Blocks until the batches are done."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._inflight = pending
+                tables = dict(self._tables)
+            for name, records in pending.items():
+                items = [{"id": record_id, "fields": fields} for record_id, fields in records.items()]
+                for start in range(0, len(items), AIRTABLE_BATCH_SIZE):
+                    batch = items[start:start + AIRTABLE_BATCH_SIZE]
+                    sent = self._send(name, tables[name], batch)
+                    if sent is None:
+                        self.failed += len(batch)
+                    elif not sent:
+                        self._requeue(name, batch)
+            with self._lock:
+                self._inflight = {}
+
+    def close(self):
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+        queued = self.stats()["queued"]
+        if queued:
+            logger.error(f"{queued} Airtable record updates could not be sent before shutdown")
+
+    def stats(self):
+        with self._lock:
+            queued = sum(len(records) for records in self._pending.values())
+        return {
+            "queued": queued,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "requests": self.requests,
+            "retries": self.retries,
+            "requeued": self.requeued,
+            "failed": self.failed,
+        }
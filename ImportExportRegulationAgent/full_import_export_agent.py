@@ -2,66 +2,28 @@ import os
 import markdown2
 from textwrap import dedent
 from agno.agent import Agent
-from mistralai import Mistral
 from html2docx import html2docx
 from agno.models.google import Gemini
-from agno.vectordb.pgvector import PgVector
 from agno.tools.googlesearch import GoogleSearchTools
-from agno.knowledge.markdown import MarkdownKnowledgeBase
 from dotenv import load_dotenv
 load_dotenv()  # charge les variables à partir d'un fichier .env
 import os
+from document_ocr import ocr_pdf
+from offline import chat_model
+from vector_store import namespaced_knowledge, load_knowledge
 
 
-mistral_key = os.getenv("MISTRAL_API_KEY")
-
-client = Mistral(api_key=mistral_key)
-
-## OCR the pdf ###
-def ocr_pdf(pdf_path):
-    # check if the file exists
-    if not os.path.exists(pdf_path):
-        st.error("PDF file not found")
-        return
-    
-    uploaded_pdf = client.files.upload(
-        file={
-            "file_name": pdf_path,
-            "content": open(pdf_path, "rb"),
-        },
-        purpose="ocr"
-    )
-
-    signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
-
-    ocr_response = client.ocr.process(
-        model="mistral-ocr-latest",
-        document={
-            "type": "document_url",
-            "document_url": signed_url.url,
-        },
-        include_image_base64=True
-    )
-
-    with open(f"Markdown/morocco-import-law.md", "w") as f:
-        f.write("\n".join([page.markdown for page in ocr_response.pages]))
 
 ## Run it only once ##
-# ocr_pdf("Documents/morocco-import-law.pdf")
+# ocr_pdf("Documents/morocco-import-law.pdf", "Markdown/morocco-import-law.md")
 # quit()
 
 ## Setup Knowledge Base ###
-knowledge_base = MarkdownKnowledgeBase(
-    path="Markdown/",
-    vector_db=PgVector(
-        table_name="markdown_documents",
-        db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-    ),
-)
+knowledge_base = namespaced_knowledge("import_export", "Markdown/")
 
 import_export_agent = Agent(
     name = 'Import Export Agent',
-    model=Gemini(id='gemini-2.0-flash'),
+    model=chat_model(Gemini(id='gemini-2.0-flash')),
     instructions = dedent("""
     You are an Export-Import Compliance Expert with access to two knowledge sources:
     - The official UK export law document for electronics (including licences, restrictions, taxes, fees),
@@ -129,11 +91,11 @@ import_export_agent = Agent(
     search_knowledge=True,
     tools = [GoogleSearchTools()]
 )
-import_export_agent.knowledge.load(recreate=False)
+load_knowledge(import_export_agent.knowledge)
 
 local_regulations_agent = Agent(
     name = 'Local Regulations Agent',
-    model=Gemini(id='gemini-2.0-flash'),
+    model=chat_model(Gemini(id='gemini-2.0-flash')),
     instructions = dedent("""
     You are a Local Regulation Checker Agent.
 
@@ -2,47 +2,14 @@ import os
 import streamlit as st
 from textwrap import dedent
 from typing import Iterator
-from mistralai import Mistral
 # from agno.workflow import Workflow
 from agno.models.openai import OpenAIChat
 from agno.agent import Agent, RunResponse
 from agno.utils.pprint import pprint_run_response
 from agno.tools.googlesearch import GoogleSearchTools
+from document_ocr import ocr_pdf
+from offline import chat_model
 
-mistral_key = os.environ["MISTRAL_API_KEY"]
-
-client = Mistral(api_key=mistral_key)
-
-# OCR the pdf and return the text
-def ocr_pdf(pdf_path, pdf_name):
-    # check if the file exists
-    if not os.path.exists(pdf_path):
-        st.error("PDF file not found")
-        return
-    
-    uploaded_pdf = client.files.upload(
-        file={
-            "file_name": pdf_path,
-            "content": open(pdf_path, "rb"),
-        },
-        purpose="ocr"
-    )
-
-    signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
-
-    ocr_response = client.ocr.process(
-        model="mistral-ocr-latest",
-        document={
-            "type": "document_url",
-            "document_url": signed_url.url,
-        },
-        include_image_base64=True
-    )
-
-    with open(f"Documents/{pdf_name}.md", "w") as f:
-        f.write("\n".join([page.markdown for page in ocr_response.pages]))
-
-    return True
 
 def export_law_document(agent, query, num_documents=None, **kwargs):
     with open("Documents/uk-export-law.md", "r") as f:
@@ -56,7 +23,7 @@ def import_law_document(agent, query, num_documents=None, **kwargs):
 
 translation_agent = Agent(
     name = 'Translation Agent',
-    model=OpenAIChat(id='gpt-4o-mini'),
+    model=chat_model(OpenAIChat(id='gpt-4o-mini')),
     instructions = dedent("""
     You are an expert in translation. You are given a text in markdown format in French and you need to translate it to English.
     IMPORTANT: Keep the same structure and content of the original text.
@@ -65,7 +32,7 @@ translation_agent = Agent(
 
 specialist_agent = Agent(
     name = 'Specialist Agent',
-    model=OpenAIChat(id='gpt-4o-mini'),
+    model=chat_model(OpenAIChat(id='gpt-4o-mini')),
     instructions = dedent("""
     You are an Export-Import Compliance Expert with access to two knowledge sources:
     - The official UK export law document for electronics (including licences, restrictions, taxes, fees),
@@ -139,8 +106,11 @@ if __name__ == "__main__":
     product_details = st.text_input("Enter your details")
     if st.button("Submit"):
         with st.spinner("Running analysis..."):
-            ocr_pdf('Documents/uk-export-law.pdf', 'uk-export-law')
-            ocr_pdf('Documents/morocco-import-law.pdf', 'morocco-import-law')
+            # Cached by PDF hash: only the first Submit calls the OCR API
+            for pdf_name in ('uk-export-law', 'morocco-import-law'):
+                if not ocr_pdf(f'Documents/{pdf_name}.pdf', f'Documents/{pdf_name}.md'):
+                    st.error("PDF file not found")
+                    st.stop()
             translation_response = translation_agent.run(import_law_document(None, None, None))
             with open("Documents/morocco-import-law.md", "w") as f:
                 f.write(translation_response.content)
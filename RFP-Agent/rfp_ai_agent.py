@@ -1,23 +1,18 @@
+import os
 import pygsheets
 import pandas as pd
 from agno.tools import tool
 from textwrap import dedent
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
-from agno.vectordb.pgvector import PgVector
 from agno.tools.reasoning import ReasoningTools
-from agno.knowledge.markdown import MarkdownKnowledgeBase
+from vector_store import namespaced_knowledge, load_knowledge
 
 gc = pygsheets.authorize(client_secret='client_secret.json')
 
 ### Setup Knowledge Base ###
-knowledge_base = MarkdownKnowledgeBase(
-    path="Markdown/",
-    vector_db=PgVector(
-        table_name="markdown_documents",
-        db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-    ),
-)
+# Own table: the recreate=True below no longer wipes the other agents' documents
+knowledge_base = namespaced_knowledge("rfp", "Markdown/")
 
 @tool(
     name="read_sheet_as_df",
@@ -160,7 +155,7 @@ rfp_agent = Agent(
     show_tool_calls=True,
     tools=[ReasoningTools(add_instructions=True), read_sheet_as_df, write_df_to_sheet],
 )
-rfp_agent.knowledge.load(recreate=True)
+load_knowledge(rfp_agent.knowledge, recreate=True)
 
 
 rfp_agent.print_response("""
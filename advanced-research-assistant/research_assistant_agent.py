@@ -3,63 +3,22 @@ import requests
 import streamlit as st
 from textwrap import dedent
 from agno.agent import Agent
-from mistralai import Mistral
 from agno.models.google import Gemini
 from agno.models.openai import OpenAIChat
-from agno.vectordb.pgvector import PgVector
 from agno.tools.reasoning import ReasoningTools
 from agno.tools.googlesearch import GoogleSearchTools
-from agno.knowledge.markdown import MarkdownKnowledgeBase
 from dotenv import load_dotenv
 load_dotenv()  # charge les variables à partir d'un fichier .env
-import os
-
-mistral_key = os.getenv("MISTRAL_API_KEY")  # <- ne lève pas KeyError si manquant
-if not mistral_key:
-    raise RuntimeError("MISTRAL_API_KEY manquant. Ajoute-le dans .env ou dans l'environnement.")
-
+# After load_dotenv: these read settings such as MISTRAL_OCR_MODEL and PGVECTOR_DB_URL at import.
+# MISTRAL_API_KEY is only needed once the Mistral OCR backend is actually used.
+from document_ocr import ocr_pdf
+from offline import chat_model
+from vector_store import namespaced_knowledge, document_filter, load_knowledge
 
 
-client = Mistral(api_key=mistral_key)
-
-## OCR the pdf ###
-def ocr_pdf(pdf_path):
-    # check if the file exists
-    if not os.path.exists(pdf_path):
-        st.error("PDF file not found")
-        return
-    
-    uploaded_pdf = client.files.upload(
-        file={
-            "file_name": pdf_path,
-            "content": open(pdf_path, "rb"),
-        },
-        purpose="ocr"
-    )
-
-    signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
-
-    ocr_response = client.ocr.process(
-        model="mistral-ocr-latest",
-        document={
-            "type": "document_url",
-            "document_url": signed_url.url,
-        },
-        include_image_base64=True
-    )
-
-    with open(f"DocumentMarkdown/ocr_document.md", "w") as f:
-        f.write("\n".join([page.markdown for page in ocr_response.pages]))
-
 def knowledge_base_setup():
     ### Setup Knowledge Base ###
-    knowledge_base = MarkdownKnowledgeBase(
-        path="DocumentMarkdown/ocr_document.md",
-        vector_db=PgVector(
-            table_name="markdown_documents",
-            db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-        ),
-    )
+    knowledge_base = namespaced_knowledge("research", "DocumentMarkdown/ocr_document.md")
     return knowledge_base
 
 def semantic_scholar_search(query):
@@ -73,22 +32,24 @@ def summary_agent():
     knowledge_base = knowledge_base_setup()
     summary_agent = Agent(
         name="Summary Agent",
-        model=Gemini(id='gemini-2.0-flash'),
+        model=chat_model(Gemini(id='gemini-2.0-flash')),
         instructions=dedent("""
         You are a summary agent designed to summarize the document.
         Read the entire document stored in the knowledge base (in markdown format) and produce a concise summary in plain English. Keep it focused on the paper’s objective, methodology, and key findings.
         """),
         knowledge=knowledge_base,
         search_knowledge=True,
+        # Only the paper uploaded now, not earlier ones still in the table
+        knowledge_filters=document_filter("DocumentMarkdown/ocr_document.md"),
     )
-    summary_agent.knowledge.load(recreate=False)
+    load_knowledge(summary_agent.knowledge)
     return summary_agent
 
 def agent_setup():
     knowledge_base = knowledge_base_setup()
     research_agent = Agent(
         name="Research Agent",
-        model=Gemini(id='gemini-2.0-flash'),
+        model=chat_model(Gemini(id='gemini-2.0-flash')),
         instructions=dedent("""
         You are a research assistant designed to simplify and answer questions about academic papers. Your behavior follows this logic:
 
@@ -114,9 +75,10 @@ def agent_setup():
         """),
         knowledge=knowledge_base,
         search_knowledge=True,
+        knowledge_filters=document_filter("DocumentMarkdown/ocr_document.md"),
         tools=[ReasoningTools(add_instructions=True), semantic_scholar_search, GoogleSearchTools()],
     )
-    research_agent.knowledge.load(recreate=False)
+    load_knowledge(research_agent.knowledge)
 
     return research_agent
 
@@ -139,7 +101,7 @@ if __name__ == "__main__":
         with open(f"DocumentMarkdown/{uploaded_file.name}", "wb") as f:
             f.write(uploaded_file.read())
         with st.spinner("Performing OCR..."):
-            ocr_pdf(f"DocumentMarkdown/{uploaded_file.name}")
+            ocr_pdf(f"DocumentMarkdown/{uploaded_file.name}", "DocumentMarkdown/ocr_document.md")
         st.success("OCR completed successfully")
         st.session_state.ocr_done = True
         st.session_state.summary_agent = summary_agent()
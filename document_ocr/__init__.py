@@ -0,0 +1,6 @@
+"""OCR for the agents' PDFs, shared so a document is only ever OCR'd once."""
+from .cache import OCRCache, pdf_sha256
+from .mistral_ocr import OCR_MODEL
+from .pipeline import OCRPipeline, get_backend, ocr_pages, ocr_pdf
+
+__all__ = ["OCRCache", "pdf_sha256", "OCR_MODEL", "OCRPipeline", "get_backend", "ocr_pages", "ocr_pdf"]
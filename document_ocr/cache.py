@@ -0,0 +1,113 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+
+
+def pdf_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe(name):
+    return "".join(c if c.isalnum() or c in "-._" else "_" for c in name)
+
+
+class OCRCache:
+    """Per-page OCR markdown on disk, keyed by PDF content and OCR model.
+
+    Layout is `<directory>/<sha256>/<model>/0001.md ...` plus a manifest.json
+    holding the page count, and extracted images under `images/`. The
+    manifest is written last, so a document only counts as cached once every
+    page is on disk. A changed PDF gets a new hash and a new model gets a new
+    folder, so entries never go stale.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv("OCR_CACHE_DIR", os.path.expanduser("~/.cache/document_ocr"))
+        self.hits = 0
+        self.misses = 0
+
+    def _folder(self, sha256, model):
+        return os.path.join(self.directory, sha256, _safe(model))
+
+    def _page_path(self, sha256, model, index):
+        return os.path.join(self._folder(sha256, model), f"{index + 1:04d}.md")
+
+    def page_count(self, sha256, model):
+        """Number of pages if the document is fully cached, else None."""
+        try:
+            with open(os.path.join(self._folder(sha256, model), "manifest.json")) as f:
+                return json.load(f)["pages"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def has_page(self, sha256, model, index):
+        return os.path.exists(self._page_path(sha256, model, index))
+
+    def read_page(self, sha256, model, index):
+        with open(self._page_path(sha256, model, index), encoding="utf-8") as f:
+            return f.read()
+
+    def lookup(self, sha256, model):
+        """Like page_count, but counted as a cache hit or miss."""
+        count = self.page_count(sha256, model)
+        if count is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return count
+
+    def load(self, sha256, model):
+        """All pages as a list, or None if the document isn't fully cached."""
+        count = self.lookup(sha256, model)
+        if count is None:
+            return None
+        return [self.read_page(sha256, model, index) for index in range(count)]
+
+    def put_image(self, sha256, model, name, data):
+        folder = os.path.join(self._folder(sha256, model), "images")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, _safe(name)), "wb") as f:
+            f.write(data)
+
+    def copy_images(self, sha256, model, destination):
+        """Copy the document's extracted images to destination, return how many there were."""
+        folder = os.path.join(self._folder(sha256, model), "images")
+        if not os.path.isdir(folder):
+            return 0
+        os.makedirs(destination, exist_ok=True)
+        names = os.listdir(folder)
+        for name in names:
+            shutil.copyfile(os.path.join(folder, name), os.path.join(destination, name))
+        return len(names)
+
+    def put_page(self, sha256, model, index, markdown):
+        folder = self._folder(sha256, model)
+        os.makedirs(folder, exist_ok=True)
+        path = self._page_path(sha256, model, index)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(markdown)
+        os.replace(path + ".tmp", path)
+
+    def complete(self, sha256, model, pages, source=None):
+        """Mark the document as fully cached once all `pages` pages are stored."""
+        folder = self._folder(sha256, model)
+        manifest = {"pages": pages, "model": model, "source": source, "created_at": time.time()}
+        with open(os.path.join(folder, "manifest.json.tmp"), "w") as f:
+            json.dump(manifest, f)
+        os.replace(os.path.join(folder, "manifest.json.tmp"), os.path.join(folder, "manifest.json"))
+        logging.info(f"Cached {pages} OCR pages for {source or sha256[:12]} ({model})")
+
+    def store(self, sha256, model, pages, source=None):
+        for index, markdown in enumerate(pages):
+            self.put_page(sha256, model, index, markdown)
+        self.complete(sha256, model, len(pages), source)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,47 @@
+import os
+
+# Part of the cache key: pin a dated model (e.g. mistral-ocr-2505) to get
+# a fresh OCR when Mistral ships a new one
+OCR_MODEL = os.getenv("MISTRAL_OCR_MODEL", "mistral-ocr-latest")
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from mistralai import Mistral
+        _client = Mistral(api_key=os.environ["MISTRAL_API_KEY"])
+    return _client
+
+
+def upload(pdf_path):
+    """Upload pdf_path once and return a signed URL every OCR request can use."""
+    client = get_client()
+    with open(pdf_path, "rb") as f:
+        uploaded_pdf = client.files.upload(
+            file={
+                "file_name": os.path.basename(pdf_path),
+                "content": f,
+            },
+            purpose="ocr"
+        )
+    return client.files.get_signed_url(file_id=uploaded_pdf.id).url
+
+
+def process(document_url, model=OCR_MODEL, pages=None, include_images=False):
+    """OCR the uploaded document, or only the given 0-based pages. Returns the response pages.
+
+    Embedded images are only sent back (base64, inside the response) with include_images.
+    """
+    kwargs = {"pages": list(pages)} if pages is not None else {}
+    ocr_response = get_client().ocr.process(
+        model=model,
+        document={
+            "type": "document_url",
+            "document_url": document_url,
+        },
+        include_image_base64=include_images,
+        **kwargs
+    )
+    return ocr_response.pages
@@ -0,0 +1,212 @@
+import os
+import time
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import mistral_ocr, text_layer
+from .cache import OCRCache, pdf_sha256
+
+default_cache = OCRCache()
+BACKENDS = {"mistral": mistral_ocr, "text": text_layer}
+
+
+def get_backend(name=None):
+    """OCR backend module by name, OCR_BACKEND from the environment by default."""
+    name = name or os.getenv("OCR_BACKEND", "mistral")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{name}', use one of {sorted(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def pdf_page_count(pdf_path):
+    """Page count from pypdf, or None when it isn't installed or can't read the file."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:  # without a page count the PDF goes in one request
+        return None
+    try:
+        return len(PdfReader(pdf_path).pages)
+    except Exception as e:
+        logging.warning(f"Could not count pages of {pdf_path}: {e}")
+        return None
+
+
+def page_ranges(count, size):
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+class OCRPipeline:
+    """OCR a PDF as page ranges in parallel, streamed back in page order.
+
+    The PDF is uploaded once, then each range of `range_size` pages is a
+    separate OCR request on a pool of `workers` threads. A failed range is
+    retried on its own with exponential backoff. Pages go to the OCRCache as
+    soon as their range finishes, so a run that still fails can be resumed
+    and only redoes the missing ranges. Per-range timings end up in
+    `last_report`.
+
+    Embedded images are left out of the OCR responses unless `image_dir` is
+    set. Then they are decoded to files as each range arrives (cached with
+    the pages) and copied to `image_dir`, where the markdown's image links
+    point. At most `workers` range responses are in memory at once.
+
+    `backend` is mistral_ocr (the default) or text_layer, which reads the
+    PDF's text locally, see get_backend().
+    """
+
+    def __init__(self, model=None, cache=None, range_size=None, workers=None, retries=3, backoff=2.0, image_dir=None, backend=None):
+        self.backend = get_backend(backend) if backend is None or isinstance(backend, str) else backend
+        self.model = model or self.backend.OCR_MODEL
+        self.cache = cache or default_cache
+        self.range_size = range_size or int(os.getenv("OCR_RANGE_SIZE", "25"))
+        self.workers = workers or int(os.getenv("OCR_WORKERS", "4"))
+        self.retries = retries
+        self.backoff = backoff
+        self.image_dir = image_dir
+        self.last_report = None
+
+    @property
+    def cache_key(self):
+        # Pages OCR'd without images have no image files to hand out
+        return f"{self.model}+images" if self.image_dir else self.model
+
+    def run(self, pdf_path):
+        """Markdown of every page of pdf_path, in order."""
+        return list(self.iter_pages(pdf_path))
+
+    def iter_pages(self, pdf_path):
+        """Yield the markdown of each page in order, as soon as its range is done."""
+        started = time.perf_counter()
+        sha256 = pdf_sha256(pdf_path)
+        count = self.cache.lookup(sha256, self.cache_key)
+        if count is not None:
+            for index in range(count):
+                yield self.cache.read_page(sha256, self.cache_key, index)
+            self._copy_images(sha256)
+            logging.info(f"OCR cache hit for {pdf_path}: {count} pages in {(time.perf_counter() - started) * 1000:.0f} ms")
+            self.last_report = {"pdf": pdf_path, "cached": True, "pages": count, "ranges": []}
+            return
+
+        count = pdf_page_count(pdf_path)
+        ranges = [None] if count is None else page_ranges(count, self.range_size)
+        # Ranges left over from an earlier failed run are already on disk
+        done = {pages: None for pages in ranges if pages is not None and self._cached(sha256, pages)}
+        todo = [pages for pages in ranges if pages not in done]
+        timings = []
+        failed = []
+        position = 0
+        if todo:
+            document_url = self.backend.upload(pdf_path)
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(todo))) as pool:
+                futures = {pool.submit(self._ocr_range, document_url, sha256, pages): pages for pages in todo}
+                for future in as_completed(futures):
+                    pages = futures[future]
+                    try:
+                        timing = future.result()
+                    except Exception as e:
+                        failed.append(pages)
+                        logging.error(f"OCR of {pdf_path} pages {self._label(pages)} failed: {e}")
+                        continue
+                    timings.append(timing)
+                    done[pages] = timing
+                    # Hand out every page up to the first range still missing
+                    while not failed and position < len(ranges) and ranges[position] in done:
+                        yield from self._read_range(sha256, ranges[position], done[ranges[position]])
+                        position += 1
+        if failed:
+            raise RuntimeError(f"OCR failed for pages {', '.join(self._label(pages) for pages in failed)} of {pdf_path}")
+        for pages in ranges[position:]:
+            yield from self._read_range(sha256, pages, done[pages])
+        if count is None:
+            count = timings[0]["pages"]
+        self.cache.complete(sha256, self.cache_key, count, source=os.path.basename(pdf_path))
+        self._copy_images(sha256)
+
+        elapsed = time.perf_counter() - started
+        timings.sort(key=lambda timing: timing["start"])
+        self.last_report = {"pdf": pdf_path, "cached": False, "pages": count, "seconds": round(elapsed, 2), "ranges": timings}
+        slowest = max((timing["seconds"] for timing in timings), default=0)
+        logging.info(f"OCR'd {pdf_path}: {count} pages in {len(timings)} ranges, {elapsed:.1f}s total, slowest range {slowest:.1f}s")
+
+    @staticmethod
+    def _label(pages):
+        return "all" if pages is None else f"{pages[0] + 1}-{pages[1]}"
+
+    def _cached(self, sha256, pages):
+        return all(self.cache.has_page(sha256, self.cache_key, index) for index in range(*pages))
+
+    def _read_range(self, sha256, pages, timing):
+        # A whole-document request only knows its page count once it's done
+        start, end = pages if pages is not None else (0, timing["pages"])
+        for index in range(start, end):
+            yield self.cache.read_page(sha256, self.cache_key, index)
+
+    def _copy_images(self, sha256):
+        if self.image_dir:
+            copied = self.cache.copy_images(sha256, self.cache_key, self.image_dir)
+            logging.info(f"Wrote {copied} OCR images to {self.image_dir}")
+
+    def _store(self, sha256, page):
+        for image in page.images if self.image_dir else []:
+            if image.image_base64:
+                # Sent as a data URI: "data:image/jpeg;base64,...."
+                self.cache.put_image(sha256, self.cache_key, image.id, base64.b64decode(image.image_base64.split(",", 1)[-1]))
+        self.cache.put_page(sha256, self.cache_key, page.index, page.markdown)
+
+    def _ocr_range(self, document_url, sha256, pages):
+        indexes = None if pages is None else range(*pages)
+        for attempt in range(1, self.retries + 1):
+            started = time.perf_counter()
+            try:
+                result = self.backend.process(document_url, self.model, indexes, include_images=bool(self.image_dir))
+                returned = {page.index for page in result}
+                if indexes is not None and not returned.issuperset(indexes):
+                    raise ValueError(f"missing pages {sorted(set(indexes) - returned)}")
+                for page in result:
+                    self._store(sha256, page)
+                seconds = time.perf_counter() - started
+                logging.info(f"OCR pages {self._label(pages)}: {len(result)} pages in {seconds:.1f}s (attempt {attempt})")
+                return {
+                    "start": pages[0] if pages else 0,
+                    "range": self._label(pages),
+                    "pages": len(result),
+                    "attempts": attempt,
+                    "seconds": round(seconds, 2),
+                }
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** (attempt - 1)
+                logging.warning(f"OCR pages {self._label(pages)} attempt {attempt} failed ({e}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+
+
+def ocr_pages(pdf_path, model=None, cache=None, pipeline=None):
+    """Markdown of every page of pdf_path, from the cache when the PDF was OCR'd before."""
+    pipeline = pipeline or OCRPipeline(model=model, cache=cache)
+    return pipeline.run(pdf_path)
+
+
+def ocr_pdf(pdf_path, output_path, model=None, cache=None, pipeline=None, image_dir=None):
+    """OCR pdf_path into one markdown file at output_path, page by page.
+
+    Returns output_path, or None if the PDF is missing. With image_dir, the
+    PDF's embedded images are written there as separate files.
+    """
+    if not os.path.exists(pdf_path):
+        logging.error(f"PDF file not found: {pdf_path}")
+        return None
+    pipeline = pipeline or OCRPipeline(model=model, cache=cache, image_dir=image_dir)
+    # Written next to the output and renamed at the end, so a failed run leaves the old file alone
+    partial_path = output_path + ".part"
+    try:
+        with open(partial_path, "w") as f:
+            for index, markdown in enumerate(pipeline.iter_pages(pdf_path)):
+                if index:
+                    f.write("\n")
+                f.write(markdown)
+    except Exception:
+        os.remove(partial_path)
+        raise
+    os.replace(partial_path, output_path)
+    return output_path
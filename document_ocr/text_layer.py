@@ -0,0 +1,28 @@
+"""Local stand-in for Mistral OCR: the PDF's own text layer, read with pypdf.
+
+Same upload/process interface as mistral_ocr, so OCRPipeline can use either.
+Scanned PDFs have no text layer and come back as empty pages.
+"""
+from dataclasses import dataclass, field
+
+# Cached separately from real OCR output
+OCR_MODEL = "pypdf-text-layer"
+
+
+@dataclass
+class TextPage:
+    index: int
+    markdown: str
+    images: list = field(default_factory=list)
+
+
+def upload(pdf_path):
+    # Nothing to upload, the "document URL" is the local path
+    return pdf_path
+
+
+def process(document_url, model=OCR_MODEL, pages=None, include_images=False):
+    from pypdf import PdfReader
+    reader = PdfReader(document_url)
+    indexes = range(len(reader.pages)) if pages is None else pages
+    return [TextPage(index, reader.pages[index].extract_text() or "") for index in indexes]
@@ -1,13 +1,51 @@
 import os
 import base64
+import logging
+import threading
 # from letta_client import Letta
 from dotenv import load_dotenv
 from agno.agent import Agent
 from agno.media import Image
 from agno.models.openai import OpenAIChat
+from vision_cache import VisionCache
 
 load_dotenv()
 
+# Same product photo -> same specification, skip the vision call
+# Near-duplicate matching is opt-in, e.g. VISION_CACHE_MAX_DISTANCE=4 (bits out of 64)
+VISION_CACHE_MAX_DISTANCE = os.getenv('VISION_CACHE_MAX_DISTANCE')
+vision_cache = VisionCache(
+    directory=os.getenv('VISION_CACHE_DIR', 'vision_cache'),
+    max_bytes=int(os.getenv('VISION_CACHE_MAX_MB', '50')) * 1024 * 1024,
+    max_distance=int(VISION_CACHE_MAX_DISTANCE) if VISION_CACHE_MAX_DISTANCE else None,
+)
+
+# One vision agent per worker thread, built on first use and then reused
+_agents = threading.local()
+
+
+def get_vision_agent():
+    if not hasattr(_agents, 'agent'):
+        _agents.agent = Agent(
+            model=OpenAIChat(id='gpt-4o-mini'),
+            instructions="""
+            If an image is given, you are responsible for defining the object on the image, (if it's a product define what is it in details),
+            along with it's name, dimensions and material.
+            IMPORTANT: Do not ask back, only give product specifications, dimensions and material!
+            """,
+        )
+    return _agents.agent
+
+
+def run_vision_agent(*args, **kwargs):
+    agent = get_vision_agent()
+    try:
+        return agent.run(*args, **kwargs).content
+    finally:
+        # The agent lives as long as its thread, don't let memory keep every run and image
+        if agent.memory is not None:
+            agent.memory.clear()
+
 
 # LETTA_TOKEN = os.getenv('LETTA_API_KEY')
 # AGENT_ID = os.getenv('AGENT_ID')
@@ -23,9 +61,16 @@ load_dotenv()
 #     template_version="Companion:latest",
 # )
 
+def freight_prompt(message, specification):
+    return f"""
+    User Question: {message}
+    Product Specifications: {specification}
+    """
+
+
 # message agent
-def get_response(message):
-    message = message
+def get_specification(message):
+    """Return (user question, product specification) for a text or image message."""
     image_data = None
     print('--------------Agent triggered--------------')
     if isinstance(message, dict):
@@ -34,24 +79,22 @@ def get_response(message):
         message = message.get('caption')
 
     print('---message---', message)
-    agent = Agent(
-        model=OpenAIChat(id='gpt-4o-mini'),
-        instructions="""
-        If an image is given, you are responsible for defining the object on the image, (if it's a product define what is it in details),
-        along with it's name, dimensions and material.
-        IMPORTANT: Do not ask back, only give product specifications, dimensions and material!
-        """,
-    )
     if image_data:
-        response = agent.run('Please define the object on the image, along with it\'s name, dimensions and material.', images=[Image(content=image_data)])
+        # The image prompt doesn't use the caption, so the image alone is the key
+        specification = vision_cache.get(image_data)
+        if specification is None:
+            specification = run_vision_agent('Please define the object on the image, along with it\'s name, dimensions and material.', images=[Image(content=image_data)])
+            vision_cache.put(image_data, specification)
+        else:
+            logging.info("Vision cache hit, skipped the vision call")
     else:
-        response = agent.run(message)
-    print('---response---', response.content)
-    full_response = f"""
-    User Question: {message}
-    Product Specifications: {response.content}
-    """
-    return full_response
+        specification = run_vision_agent(message)
+    print('---response---', specification)
+    return message, specification
+
+
+def get_response(message):
+    return freight_prompt(*get_specification(message))
 
 
 if __name__ == '__main__':
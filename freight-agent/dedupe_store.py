@@ -0,0 +1,65 @@
+import time
+import sqlite3
+import logging
+import threading
+
+
+class MemoryDedupeStore:
+    """Remembers WhatsApp message ids for `ttl` seconds, in process memory."""
+
+    def __init__(self, ttl=86400):
+        self.ttl = ttl
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._last_purge = time.time()
+
+    def _purge(self, now):
+        # Sweep at most once a minute, it's O(n)
+        if now - self._last_purge < 60:
+            return
+        self._seen = {message_id: at for message_id, at in self._seen.items() if now - at < self.ttl}
+        self._last_purge = now
+
+    def seen_or_add(self, message_id):
+        """Return True if message_id was already seen, otherwise record it and return False."""
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            seen_at = self._seen.get(message_id)
+            if seen_at is not None and now - seen_at < self.ttl:
+                return True
+            self._seen[message_id] = now
+            return False
+
+
+class SQLiteDedupeStore:
+    """Same as MemoryDedupeStore, but kept in SQLite so it survives restarts."""
+
+    def __init__(self, path, ttl=86400):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen_messages (message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        self._last_purge = 0.0
+
+    def seen_or_add(self, message_id):
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge > 60:
+                self._conn.execute("DELETE FROM seen_messages WHERE seen_at < ?", (now - self.ttl,))
+                self._last_purge = now
+            # The insert is the check: it only succeeds for a new (or expired) id
+            cursor = self._conn.execute(
+                "INSERT INTO seen_messages (message_id, seen_at) VALUES (?, ?) "
+                "ON CONFLICT(message_id) DO UPDATE SET seen_at = excluded.seen_at WHERE seen_at < ?",
+                (message_id, now, now - self.ttl),
+            )
+            return cursor.rowcount == 0
+
+
+def make_dedupe_store(sqlite_path=None, ttl=86400):
+    if sqlite_path:
+        logging.info(f"Using SQLite dedupe store at {sqlite_path}")
+        return SQLiteDedupeStore(sqlite_path, ttl)
+    return MemoryDedupeStore(ttl)
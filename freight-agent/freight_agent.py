@@ -1,95 +1,125 @@
 import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 # import requests
 from textwrap import dedent
 from agno.agent import Agent
-from mistralai import Mistral
 from agno.models.openai import OpenAIChat
-from agno.vectordb.pgvector import PgVector
 from agno.tools.reasoning import ReasoningTools
 from agno.tools.googlesearch import GoogleSearchTools
-from agno.knowledge.markdown import MarkdownKnowledgeBase
-
-mistral_key = os.environ["MISTRAL_API_KEY"]
-
-client = Mistral(api_key=mistral_key)
-
-## OCR the pdf ###
-def ocr_pdf(pdf_path):
-    # check if the file exists
-    if not os.path.exists(pdf_path):
-        st.error("PDF file not found")
-        return
-    
-    uploaded_pdf = client.files.upload(
-        file={
-            "file_name": pdf_path,
-            "content": open(pdf_path, "rb"),
-        },
-        purpose="ocr"
-    )
-
-    signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
+import glob
+from rate_engine import RateEngine
+from zone_index import ZoneIndex
+from risk_cache import RiskCache
+from shipment_normaliser import normalise_shipment
+from document_ocr import ocr_pdf
+from offline import chat_model
+from vector_store import namespaced_knowledge, load_knowledge
 
-    ocr_response = client.ocr.process(
-        model="mistral-ocr-latest",
-        document={
-            "type": "document_url",
-            "document_url": signed_url.url,
-        },
-        include_image_base64=True
-    )
-
-    with open(f"Document/ups_document.md", "w") as f:
-        f.write("\n".join([page.markdown for page in ocr_response.pages]))
 
 ## Run it only once ##
-# ocr_pdf("Document/ups_rate_guide_2025.pdf")
+# ocr_pdf("Document/ups_rate_guide_2025.pdf", "Document/ups_document.md")
 # quit()
 
-## Setup Knowledge Base ###
-knowledge_base = MarkdownKnowledgeBase(
-    path="Markdown/",
-    vector_db=PgVector(
-        table_name="markdown_documents",
-        db_url="postgresql+psycopg://ai:ai@localhost:5532/ai",
-    ),
-)
+## Parse the UPS rate tables once, quotes are then plain array lookups ##
+UPS_RATE_GUIDE = "Document/ups_document.md"
+ups_rates = RateEngine.from_file(UPS_RATE_GUIDE) if os.path.exists(UPS_RATE_GUIDE) else None
 
-freight_agent = Agent(
-    name="Freight Agent",
-    model=OpenAIChat(id='gpt-4o-mini'),
-    instructions=dedent("""
-    You are a Freight Cost Estimator Agent that helps small import/export businesses estimate and compare shipping costs and timelines across major carriers.
+def ups_rate_services() -> str:
+    """List the UPS services and surcharges available to ups_rate_quote.
 
+    Returns:
+        str: JSON with the service names and surcharge names.
+    """
+    if ups_rates is None:
+        return json.dumps({"error": "UPS rate guide not loaded"})
+    return json.dumps({"services": ups_rates.service_names(), "surcharges": sorted(ups_rates.surcharges)})
 
-    You have access to:
-    - A knowledge base built from 2024 rate guides and surcharge tables for UPS, FedEx, and DHL.
-    - A tool called GoogleSearchTools() to fetch live or missing data, such as average delays, service disruptions, or cost gaps not found in the documents.
+def ups_rate_quote(service: str, zone: int, weight_lbs: float, surcharges: str = "", fuel_percent: float = 0) -> str:
+    """Compute an exact UPS quote from the rate guide tables.
 
-    When a user gives you (origin, destination, cargo details) as 'User Question', along with the product details and dimensions as 'Product Specifications', follow this process:
+    Args:
+        service (str): UPS service name, e.g. "Ground" or "Next Day Air".
+        zone (int): UPS zone for the shipping lane.
+        weight_lbs (float): Billable weight in pounds.
+        surcharges (str): Comma-separated surcharge names, e.g. "residential, additional handling".
+        fuel_percent (float): Current fuel surcharge percentage, if known.
 
-    1. Identify the ZIP codes or cities from the origin and destination to determine the shipping lane and applicable zone.
-    2. For **each carrier (UPS, FedEx, DHL)**:
-    a. Select the most appropriate service type (e.g., Ground, Express, Economy) based on weight, distance, and general business priority.
-    b. Look up the base rate using the rate table.
-    c. Add relevant surcharges (e.g., fuel, residential delivery, oversized packages).
-    d. Estimate delivery time using the knowledge base or GoogleSearchTools().
-    e. Estimate delay risk using historical info or GoogleSearchTools().
-    3. Compare all three carriers based on:
-    - Total cost (including surcharges)
-    - Delivery time
-    - Delay risk
-    4. Recommend the **best option** based on a balance of cost, speed, and reliability.
-    5. Present the output as a clean comparison table followed by a recommendation summary:
-    - Justify your choice
-    - Note any assumptions (e.g., guessed weight or pallet size)
-    - List the sources used
+    Returns:
+        str: JSON with the base rate, each surcharge and the total.
+    """
+    if ups_rates is None:
+        return json.dumps({"error": "UPS rate guide not loaded"})
+    names = [name.strip() for name in surcharges.split(",") if name.strip()]
+    try:
+        return json.dumps(ups_rates.quote(service, zone, weight_lbs, names, fuel_percent or None))
+    except (KeyError, ValueError) as e:
+        return json.dumps({"error": str(e)})
 
-    All that should be based on the products dimensions and specifications!
+## ZIP prefix -> zone array built from the zone charts, memory-mapped ##
+ZONE_INDEX_PATH = "Document/zone_index.npy"
+zone_chart_sources = sorted(glob.glob("Markdown/*.md") + glob.glob("Document/*.md"))
+zone_index = ZoneIndex.load_or_build(zone_chart_sources, ZONE_INDEX_PATH) if zone_chart_sources else None
 
-    Always be transparent about the decision logic and flag if the choice depends on assumptions or missing data.
-    """),
-    expected_output=dedent("""
+def ups_zone(origin_zip: str, destination_zip: str, service: str = "Ground") -> str:
+    """Look up the UPS zone for a shipping lane from the zone charts.
+
+    Args:
+        origin_zip (str): Origin ZIP code, e.g. "80202".
+        destination_zip (str): Destination ZIP code, e.g. "85001".
+        service (str): UPS service, e.g. "Ground" or "Next Day Air".
+
+    Returns:
+        str: JSON with the zone, or an error if the lane isn't charted.
+    """
+    if zone_index is None:
+        return json.dumps({"error": "Zone charts not loaded"})
+    try:
+        zone = zone_index.lookup(origin_zip, destination_zip, service)
+    except (KeyError, ValueError) as e:
+        return json.dumps({"error": str(e)})
+    if zone is None:
+        return json.dumps({"error": f"No zone charted from {origin_zip} to {destination_zip} for {service}"})
+    return json.dumps({"origin_zip": origin_zip, "destination_zip": destination_zip, "service": service, "zone": zone})
+
+def search_lane_risk(carrier, origin, destination):
+    # Fresh agent per search: refreshes run on background threads
+    search_agent = Agent(
+        model=chat_model(OpenAIChat(id='gpt-4o-mini')),
+        instructions=dedent("""
+        Use GoogleSearchTools() to find current and typical delays, service disruptions and transit times for the given carrier and lane.
+        Answer in at most 5 short bullet points: typical transit time, current disruptions (weather, strikes, capacity, peak season), delay risk (Low/Medium/High) with a one-line reason, and the sources.
+        """),
+        tools=[GoogleSearchTools()],
+    )
+    return search_agent.run(f"Carrier: {carrier}\nOrigin: {origin}\nDestination: {destination}").content
+
+# Delay facts change over hours, so repeated quotes on a lane reuse one search
+risk_cache = RiskCache(
+    search_lane_risk,
+    ttl=int(os.getenv("RISK_CACHE_TTL", str(6 * 3600))),
+    stale_ttl=int(os.getenv("RISK_CACHE_STALE_TTL", str(18 * 3600))),
+    top_lanes=int(os.getenv("RISK_CACHE_TOP_LANES", "20")),
+)
+
+def lane_risk(carrier: str, origin: str, destination: str) -> str:
+    """Get current delay and disruption risk for a carrier on a shipping lane.
+
+    Args:
+        carrier (str): "UPS", "FedEx" or "DHL".
+        origin (str): Origin ZIP code or city, e.g. "80202" or "Denver, CO".
+        destination (str): Destination ZIP code or city.
+
+    Returns:
+        str: Typical transit time, current disruptions and delay risk, with sources.
+    """
+    return risk_cache.get(carrier, origin, destination)
+
+## Setup Knowledge Base ###
+knowledge_base = namespaced_knowledge("freight", "Markdown/")
+
+COMPARISON_OUTPUT = dedent("""
     📦 Freight Cost Comparison (NOT AS TABLE)
 
     UPS
@@ -132,23 +162,143 @@ freight_agent = Agent(
     📑 Sources
     - UPS, FedEx, DHL 2024 Freight Tariffs (internal KB)
     - [Google Search] "Freight performance for heavy industrial equipment"
+    """)
+
+freight_agent = Agent(
+    name="Freight Agent",
+    model=chat_model(OpenAIChat(id='gpt-4o-mini')),
+    instructions=dedent("""
+    You are a Freight Cost Estimator Agent that helps small import/export businesses estimate and compare shipping costs and timelines across major carriers.
+
+
+    You have access to:
+    - A knowledge base built from 2024 rate guides and surcharge tables for UPS, FedEx, and DHL.
+    - A tool called lane_risk() that returns average delays, service disruptions and delay risk for a carrier on a lane.
+    - A tool called GoogleSearchTools() to fetch live or missing data, such as cost gaps not found in the documents.
+
+    When a user gives you (origin, destination, cargo details) as 'User Question', along with the product details and dimensions as 'Product Specifications', follow this process:
+
+    1. Identify the ZIP codes or cities from the origin and destination to determine the shipping lane and applicable zone. For UPS, get the zone with ups_zone() instead of searching for it.
+    Call normalise_shipment() with the full request text once to get weights, dimensions and each carrier's billable weight. Price on those billable weights, do not redo the dim weight maths.
+    2. For **each carrier (UPS, FedEx, DHL)**:
+    a. Select the most appropriate service type (e.g., Ground, Express, Economy) based on weight, distance, and general business priority.
+    b. Look up the base rate using the rate table. For UPS, call ups_rate_quote() (see ups_rate_services() for names) and use its numbers as-is, only explain them.
+    c. Add relevant surcharges (e.g., fuel, residential delivery, oversized packages). For UPS, pass them to ups_rate_quote().
+    d. Estimate delivery time using the knowledge base or lane_risk().
+    e. Estimate delay risk with lane_risk(), do not search the web for delays.
+    3. Compare all three carriers based on:
+    - Total cost (including surcharges)
+    - Delivery time
+    - Delay risk
+    4. Recommend the **best option** based on a balance of cost, speed, and reliability.
+    5. Present the output as a clean comparison table followed by a recommendation summary:
+    - Justify your choice
+    - Note any assumptions (e.g., guessed weight or pallet size)
+    - List the sources used
+
+    All that should be based on the products dimensions and specifications!
+
+    Always be transparent about the decision logic and flag if the choice depends on assumptions or missing data.
     """),
-    tools=[ReasoningTools(add_instructions=True), GoogleSearchTools()],
+    expected_output=COMPARISON_OUTPUT,
+    tools=[ReasoningTools(add_instructions=True), GoogleSearchTools(), lane_risk, normalise_shipment, ups_zone, ups_rate_services, ups_rate_quote],
     knowledge=knowledge_base,
     search_knowledge=True,
 )
-freight_agent.knowledge.load(recreate=False)
+load_knowledge(freight_agent.knowledge)
 
 # freight_agent.print_response("Shipping 3 crates of machine parts from Chicago, IL (60601) to Atlanta, GA (30301). Each crate is about 200 lbs. Can you estimate the cost and delivery time?")
 
 # I need to ship this product from Denver, CO (80202) to Phoenix, AZ (85001). Can you estimate the cost, delivery time, and potential delays?
 
+CARRIERS = ["UPS", "FedEx", "DHL"]
+PARALLEL_QUOTES = os.getenv("FREIGHT_PARALLEL_QUOTES", "1") == "1"
+carrier_executor = ThreadPoolExecutor(max_workers=int(os.getenv("FREIGHT_CARRIER_WORKERS", "6")))
+
+def carrier_agent(carrier):
+    # Built per request: cheap, and agents aren't shared across threads
+    tools = [GoogleSearchTools(), lane_risk, normalise_shipment]
+    if carrier == "UPS":
+        tools += [ups_zone, ups_rate_services, ups_rate_quote]
+    return Agent(
+        name=f"{carrier} Quote Agent",
+        model=chat_model(OpenAIChat(id='gpt-4o-mini')),
+        instructions=dedent(f"""
+        You are a freight quoting specialist for {carrier} only.
+        Given the 'User Question' (origin, destination, cargo) and the 'Product Specifications', produce one {carrier} quote:
+        1. Call normalise_shipment() with the full request text and use its {carrier} billable weight (palletised if it suggests pallets). Do not redo the dim weight maths.
+        2. Determine the shipping lane and zone.{" Use ups_zone() for the zone." if carrier == "UPS" else ""}
+        3. Select the most appropriate {carrier} service type based on weight, distance and general business priority.
+        4. Look up the base rate and add relevant surcharges (fuel, residential, oversized...).{" Use ups_rate_quote() and keep its numbers as-is." if carrier == "UPS" else " Search the knowledge base for " + carrier + " rate and surcharge tables."}
+        5. Estimate delivery time and delay risk with lane_risk("{carrier}", origin, destination). Do not search the web for delays.
+        Answer only with:
+        - Service Type, Total Cost (with the base rate and each surcharge), Delivery Time, Delay Risk, Notes
+        - Assumptions and Sources used
+        Do not compare with other carriers.
+        """),
+        tools=tools,
+        knowledge=knowledge_base,
+        search_knowledge=True,
+    )
+
+def comparison_agent():
+    # Built per request too, every message worker runs a comparison at the same time
+    return Agent(
+        name="Freight Comparison Agent",
+        model=chat_model(OpenAIChat(id='gpt-4o-mini')),
+        instructions=dedent("""
+        You get a freight request and one quote per carrier, each prepared separately.
+        Compare them on total cost, delivery time and delay risk, and recommend the best balance of cost, speed and reliability for this product.
+        Use the quotes' numbers as given, do not recompute or invent prices. Keep each carrier's assumptions and sources.
+        """),
+        expected_output=COMPARISON_OUTPUT,
+    )
+
+def quote_carrier(carrier, message):
+    started = time.perf_counter()
+    try:
+        content = carrier_agent(carrier).run(message).content
+    except Exception as e:
+        content = f"No quote available: {e}"
+    print(f'--------{carrier} quote in {time.perf_counter() - started:.1f}s--------')
+    return content
+
+def comparison_prompt(message):
+    """One quoting task per carrier at the same time, returned as the comparison call's prompt."""
+    started = time.perf_counter()
+    futures = {carrier: carrier_executor.submit(quote_carrier, carrier, message) for carrier in CARRIERS}
+    quotes = {carrier: future.result() for carrier, future in futures.items()}
+    print(f'--------All carrier quotes in {time.perf_counter() - started:.1f}s--------')
+    quotes_text = "\n\n".join(f"### {carrier}\n{quote}" for carrier, quote in quotes.items())
+    return f"{message}\n\nCarrier quotes:\n{quotes_text}"
+
+def parallel_response(message):
+    started = time.perf_counter()
+    response = comparison_agent().run(comparison_prompt(message))
+    print(f'--------Freight response in {time.perf_counter() - started:.1f}s--------')
+    return response.content
+
 def full_response(message):
     print('--------Freight Agent Triggered--------')
-    response = freight_agent.run(message)
-    print('response--------', response.content)
-    return response.content
+    if PARALLEL_QUOTES:
+        content = parallel_response(message)
+    else:
+        content = freight_agent.run(message).content
+    print('response--------', content)
+    return content
 
 
 ## Add DHL, Fedex for the agent to compare in term of cost and delivery time, ...
-## Add also dimension along with weight
\ No newline at end of file
+## Add also dimension along with weight
+def stream_response(message):
+    """Yield the freight answer as text deltas while the final model call is generating."""
+    print('--------Freight Agent Triggered (stream)--------')
+    if PARALLEL_QUOTES:
+        chunks = comparison_agent().run(comparison_prompt(message), stream=True)
+    else:
+        chunks = freight_agent.run(message, stream=True)
+    for chunk in chunks:
+        content = getattr(chunk, "content", None)
+        # Tool-call and reasoning events carry no text
+        if isinstance(content, str) and content:
+            yield content
@@ -0,0 +1,67 @@
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GRAPH_URL = "https://graph.facebook.com"
+
+
+class GraphClient:
+    """One keep-alive, retrying session for every call to the WhatsApp Graph API.
+
+    GETs are retried on connection errors, 429 and 5xx. POSTs are only retried
+    when the connection failed before the request was sent, so a message is
+    never delivered twice. Every call is timed and logged.
+    """
+
+    def __init__(self, access_token, version, phone_number_id, timeout=(5, 30), retries=3, pool_size=16):
+        self.version = version
+        self.phone_number_id = phone_number_id
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {access_token}"})
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            logging.info(f"Graph {method} {url.split('?')[0]} took {elapsed:.0f} ms")
+        return response
+
+    @property
+    def messages_url(self):
+        return f"{GRAPH_URL}/{self.version}/{self.phone_number_id}/messages"
+
+    def send_message(self, data):
+        return self.request("POST", self.messages_url, json=data)
+
+    def download_media(self, media_id, path, chunk_size=64 * 1024):
+        """Resolve a media id and stream the file straight to path."""
+        metadata = self.request("GET", f"{GRAPH_URL}/{self.version}/{media_id}")
+        metadata.raise_for_status()
+        media_url = metadata.json().get("url")
+        if not media_url:
+            raise ValueError(f"No download URL for media {media_id}")
+        with self.request("GET", media_url, stream=True) as response:
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        return path
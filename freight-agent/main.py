@@ -2,12 +2,15 @@ import os
 import json
 import uvicorn
 import logging
-import requests
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import PlainTextResponse, JSONResponse
-from whatsapp_utils import process_whatsapp_message, is_valid_whatsapp_message
+from message_queue import SenderOrderedPool
+from dedupe_store import make_dedupe_store
+from agent_service import vision_cache
+from freight_agent import risk_cache
+from whatsapp_utils import process_whatsapp_message, is_valid_whatsapp_message, send_message as send_whatsapp_message, get_text_message_input, graph
 
 load_dotenv()
 
@@ -16,9 +19,21 @@ PHONE_NUMBER_ID = os.getenv('PHONE_NUMBER_ID')
 WHATSAPP_ACCESS_TOKEN = os.getenv('WHATSAPP_ACCESS_TOKEN')
 RECIPIENT_PHONE_NUMBER = os.getenv('RECIPIENT_PHONE_NUMBER')
 VERIFY_TOKEN = os.getenv('VERIFY_TOKEN')
+WORKERS = int(os.getenv('WHATSAPP_WORKERS', '4'))
+MAX_QUEUE = int(os.getenv('WHATSAPP_MAX_QUEUE', '50'))
+DEDUPE_TTL = int(os.getenv('DEDUPE_TTL', '86400'))
+DEDUPE_SQLITE_PATH = os.getenv('DEDUPE_SQLITE_PATH')
+BUSY_MESSAGE = "We're handling a lot of requests right now. Please send your message again in a few minutes."
 
 app = FastAPI()
 
+# Vision + freight pipelines run on a fixed pool, one message at a time per sender
+message_pool = SenderOrderedPool(process_whatsapp_message, workers=WORKERS, max_queue=MAX_QUEUE)
+# WhatsApp redelivers webhooks we're slow to acknowledge, process each message id once
+dedupe_store = make_dedupe_store(DEDUPE_SQLITE_PATH, ttl=DEDUPE_TTL)
+# Busy replies are sent off the webhook path too
+busy_reply_executor = ThreadPoolExecutor(max_workers=1)
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the portal!"}
@@ -59,23 +74,28 @@ async def handle_message(request: Request):
 
     if is_valid_whatsapp_message(body):
         try:
-            # Run message processing in a background thread
-            Thread(target=process_whatsapp_message, args=(body,)).start()
+            value = body["entry"][0]["changes"][0]["value"]
+            message_id = value["messages"][0].get("id")
+            if message_id and dedupe_store.seen_or_add(message_id):
+                logging.info(f"Ignoring redelivered message {message_id}")
+                return JSONResponse(content={"status": "ok"})
+            wa_id = value["contacts"][0]["wa_id"]
+            if not message_pool.submit(wa_id, body):
+                busy_reply_executor.submit(send_whatsapp_message, get_text_message_input(wa_id, BUSY_MESSAGE))
         except Exception as e:
-            logging.error(f"Error starting background message thread: {e}")
+            logging.error(f"Error queueing message: {e}")
         return JSONResponse(content={"status": "ok"})
     else:
         return JSONResponse(status_code=404, content={"status": "error", "message": "Not a WhatsApp API event"})
 
 
 
+@app.get("/metrics")
+def metrics():
+    return {**message_pool.metrics(), "vision_cache": vision_cache.stats(), "risk_cache": risk_cache.stats()}
+
 @app.get("/test")
 def test():
-    url = f'https://graph.facebook.com/{VERSION}/{PHONE_NUMBER_ID}/messages'
-    headers = {
-        'Authorization': f'Bearer {WHATSAPP_ACCESS_TOKEN}',
-        'Content-Type': 'application/json'
-    }
     data = {
         'messaging_product': 'whatsapp',
         'to': RECIPIENT_PHONE_NUMBER,
@@ -87,16 +107,11 @@ def test():
             }
         }
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = graph.send_message(data)
     return {"message": "Test successful!", "response": response.json()}
 
 @app.get("/send_message")
 def send_message():
-    url = f'https://graph.facebook.com/{VERSION}/{PHONE_NUMBER_ID}/messages'
-    headers = {
-        'Authorization': f'Bearer {WHATSAPP_ACCESS_TOKEN}',
-        'Content-Type': 'application/json'
-    }
     data = {
         'messaging_product': 'whatsapp',
         'to': RECIPIENT_PHONE_NUMBER,
@@ -105,7 +120,7 @@ def send_message():
             'body': 'Hello, how are you?'
         }
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = graph.send_message(data)
     return {"message": "Message sent successfully!", "response": response.json()}
 
 # @app.get("/webhook")
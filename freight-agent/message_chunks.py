@@ -0,0 +1,57 @@
+import re
+
+# WhatsApp rejects text bodies over 4096 characters, keep a margin
+MAX_MESSAGE_CHARS = 4000
+# Don't send a message per short paragraph, wait for roughly this much text
+MIN_MESSAGE_CHARS = 400
+SECTION_BREAK = re.compile(r"\n\s*\n")
+
+
+def split_long(text, limit=MAX_MESSAGE_CHARS):
+    """Split text into pieces of at most `limit` characters, at a newline or space when possible."""
+    pieces = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        pieces.append(text[:cut].strip())
+        text = text[cut:].lstrip()
+    if text.strip():
+        pieces.append(text.strip())
+    return [piece for piece in pieces if piece]
+
+
+class SectionChunker:
+    """Turns a stream of text deltas into WhatsApp-sized messages.
+
+    Text is buffered until it holds at least `min_chars` of complete sections
+    (paragraphs ending in a blank line), then everything up to the last
+    section break goes out as one message. A section longer than `max_chars`
+    is split at line breaks. Call flush() at the end for the remainder.
+    """
+
+    def __init__(self, max_chars=MAX_MESSAGE_CHARS, min_chars=MIN_MESSAGE_CHARS):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        """Add a delta, return the messages that are ready to send."""
+        self._buffer += text
+        ready = []
+        breaks = [match.end() for match in SECTION_BREAK.finditer(self._buffer)]
+        if breaks and breaks[-1] >= self.min_chars:
+            ready.extend(split_long(self._buffer[:breaks[-1]], self.max_chars))
+            self._buffer = self._buffer[breaks[-1]:]
+        elif len(self._buffer) > self.max_chars:
+            pieces = split_long(self._buffer, self.max_chars)
+            ready.extend(pieces[:-1])
+            self._buffer = pieces[-1]
+        return ready
+
+    def flush(self):
+        ready = split_long(self._buffer, self.max_chars)
+        self._buffer = ""
+        return ready
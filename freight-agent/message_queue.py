@@ -0,0 +1,90 @@
+import time
+import queue
+import logging
+import threading
+from collections import deque
+
+
+class SenderOrderedPool:
+    """Fixed pool of workers with a bounded backlog and per-sender ordering.
+
+    Messages from the same sender are processed one at a time, in arrival
+    order, while different senders are processed in parallel. `submit`
+    returns False instead of queueing when `max_queue` messages are waiting,
+    so the caller can tell the customer we're busy.
+    """
+
+    def __init__(self, handler, workers=4, max_queue=50):
+        self.handler = handler
+        self.max_queue = max_queue
+        self._ready = queue.Queue()
+        self._senders = {}
+        self._lock = threading.Lock()
+        self._depth = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"whatsapp-worker-{i}", daemon=True).start()
+
+    def submit(self, sender, item):
+        with self._lock:
+            if self._depth >= self.max_queue:
+                self.rejected += 1
+                logging.warning(f"Queue full ({self._depth}), rejecting message from {sender}")
+                return False
+            self._depth += 1
+            self.accepted += 1
+            pending = self._senders.get(sender)
+            if pending is None:
+                # Sender not queued or in progress, schedule it
+                pending = self._senders[sender] = deque()
+                self._ready.put(sender)
+            pending.append((time.monotonic(), item))
+        return True
+
+    def _work(self):
+        while True:
+            sender = self._ready.get()
+            with self._lock:
+                enqueued_at, item = self._senders[sender].popleft()
+                self._depth -= 1
+            waited = time.monotonic() - enqueued_at
+            started = time.monotonic()
+            try:
+                self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error processing message from {sender}: {e}")
+            elapsed = time.monotonic() - started
+            logging.info(f"Message from {sender} waited {waited:.2f}s, processed in {elapsed:.2f}s")
+            with self._lock:
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._run_total += elapsed
+                if self._senders[sender]:
+                    # More messages from this sender, back of the line
+                    self._ready.put(sender)
+                else:
+                    del self._senders[sender]
+
+    def metrics(self):
+        with self._lock:
+            done = self.processed + self.failed
+            return {
+                "queue_depth": self._depth,
+                "max_queue": self.max_queue,
+                "active_senders": len(self._senders),
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "processed": self.processed,
+                "failed": self.failed,
+                "avg_wait_seconds": round(self._wait_total / done, 3) if done else 0.0,
+                "max_wait_seconds": round(self._wait_max, 3),
+                "avg_processing_seconds": round(self._run_total / done, 3) if done else 0.0,
+            }
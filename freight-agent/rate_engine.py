@@ -0,0 +1,231 @@
+import re
+import math
+import logging
+import numpy as np
+
+AMOUNT_PATTERN = re.compile(r"\$\s*([\d,]+(?:\.\d+)?)")
+PERCENT_PATTERN = re.compile(r"([\d.]+)\s*%")
+NUMBER_PATTERN = re.compile(r"^\$?\s*([\d,]+(?:\.\d+)?)$")
+# Envelope/letter rows are priced as the lightest weight break
+LETTER_WEIGHT = 0.0
+
+
+def split_cells(line):
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def is_separator(line):
+    return bool(re.fullmatch(r"\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?", line.strip()))
+
+
+def _number(text):
+    match = NUMBER_PATTERN.match(text.replace("*", "").strip())
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def _weight(text):
+    text = text.replace("*", "").strip().lower()
+    if text.startswith(("letter", "envelope")):
+        return LETTER_WEIGHT
+    match = re.match(r"^([\d,]+(?:\.\d+)?)\s*(lbs?\.?|pounds?)?$", text)
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def _zone(text):
+    match = re.search(r"(\d+)", text)
+    return int(match.group(1)) if match else None
+
+
+def _clean_heading(line):
+    return re.sub(r"[#*_`]", "", line).strip()
+
+
+def normalise(name):
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+
+def iter_tables(markdown):
+    """Yield (heading, rows) for every pipe table, rows as lists of cells."""
+    heading = ""
+    rows = []
+    for line in markdown.splitlines():
+        if line.strip().startswith("|"):
+            if not is_separator(line):
+                rows.append(split_cells(line))
+            continue
+        if rows:
+            yield heading, rows
+            rows = []
+        if line.lstrip().startswith("#"):
+            heading = _clean_heading(line)
+    if rows:
+        yield heading, rows
+
+
+class RateTable:
+    """Base rates for one service: weight breaks x zones."""
+
+    def __init__(self, service, zones, weights, rates):
+        order = np.argsort(weights, kind="stable")
+        self.service = service
+        self.zones = np.asarray(zones, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)[order]
+        self.rates = np.asarray(rates, dtype=np.float64)[order]
+        zone_order = np.argsort(self.zones)
+        self.zones = self.zones[zone_order]
+        self.rates = self.rates[:, zone_order]
+
+    def lookup(self, zones, weights):
+        """Vectorised base rates for arrays of zones and weights (NaN where not covered)."""
+        zones = np.asarray(zones, dtype=np.int32)
+        # Rates are per started pound, and a weight break covers "weight not to exceed"
+        weights = np.ceil(np.asarray(weights, dtype=np.float64))
+        cols = np.searchsorted(self.zones, zones)
+        rows = np.searchsorted(self.weights, weights, side="left")
+        valid = (cols < len(self.zones)) & (rows < len(self.weights))
+        cols = np.minimum(cols, len(self.zones) - 1)
+        rows = np.minimum(rows, len(self.weights) - 1)
+        valid &= self.zones[cols] == zones
+        result = self.rates[rows, cols]
+        return np.where(valid, result, np.nan)
+
+
+class RateEngine:
+    """Structured rate tables and surcharges parsed once from an OCR'd rate guide.
+
+    Pipe tables whose header has zone numbers become RateTables named after
+    the nearest heading above them (tables continued over several pages are
+    merged). Other table rows with a $ amount or a % become surcharges.
+    """
+
+    def __init__(self, tables, surcharges, carrier="UPS"):
+        self.carrier = carrier
+        self.tables = tables
+        self.surcharges = surcharges
+
+    @classmethod
+    def from_markdown(cls, markdown, carrier="UPS"):
+        pieces = {}
+        surcharges = {}
+        previous = None
+        for heading, rows in iter_tables(markdown):
+            header = rows[0]
+            if previous and _weight(header[0]) is not None and len(header) - 1 == len(previous[1]):
+                # Headerless table right after a rate table: its continuation on the next page
+                cls._add_rate_rows(pieces, previous[0], previous[1], rows)
+                continue
+            zones = [_zone(cell) for cell in header[1:]]
+            if len(header) > 2 and sum(zone is not None for zone in zones) >= 2:
+                previous = (heading or "Rates", zones)
+                cls._add_rate_rows(pieces, previous[0], zones, rows[1:])
+            else:
+                previous = None
+                cls._add_surcharge_rows(surcharges, rows)
+        tables = {}
+        for (service, zones), (weights, rates) in pieces.items():
+            if not weights:
+                continue
+            # Several tables can share a heading, keep each zone set apart
+            name = service if normalise(service) not in tables else f"{service} ({zones[0]}-{zones[-1]})"
+            tables[normalise(name)] = RateTable(name, zones, weights, rates)
+        logging.info(f"Parsed {len(tables)} {carrier} rate tables and {len(surcharges)} surcharges")
+        return cls(tables, surcharges, carrier)
+
+    @classmethod
+    def from_file(cls, path, carrier="UPS"):
+        with open(path) as f:
+            return cls.from_markdown(f.read(), carrier)
+
+    @staticmethod
+    def _add_rate_rows(pieces, service, zones, rows):
+        columns = [i for i, zone in enumerate(zones) if zone is not None]
+        zone_key = tuple(zones[i] for i in columns)
+        weights, rates = pieces.setdefault((service, zone_key), ([], []))
+        for row in rows:
+            if not row:
+                continue
+            weight = _weight(row[0])
+            if weight is None:
+                continue
+            values = row[1:]
+            rate_row = []
+            for i in columns:
+                value = _number(values[i]) if i < len(values) else None
+                rate_row.append(np.nan if value is None else value)
+            weights.append(weight)
+            rates.append(rate_row)
+
+    @staticmethod
+    def _add_surcharge_rows(surcharges, rows):
+        for row in rows:
+            if len(row) < 2 or not row[0]:
+                continue
+            label = normalise(row[0])
+            if not label or label in surcharges:
+                continue
+            for cell in row[1:]:
+                amount = AMOUNT_PATTERN.search(cell)
+                if amount:
+                    surcharges[label] = ("fixed", float(amount.group(1).replace(",", "")))
+                    break
+                percent = PERCENT_PATTERN.search(cell)
+                if percent:
+                    surcharges[label] = ("percent", float(percent.group(1)))
+                    break
+
+    def find_table(self, service):
+        key = normalise(service)
+        if key in self.tables:
+            return self.tables[key]
+        matches = [name for name in self.tables if key in name or name in key]
+        if not matches:
+            raise KeyError(f"No {self.carrier} rate table for '{service}'. Known services: {self.service_names()}")
+        # Prefer the tightest match, e.g. "ground" -> "ground" over "ground commercial"
+        return self.tables[min(matches, key=len)]
+
+    def find_surcharge(self, name):
+        key = normalise(name)
+        if key in self.surcharges:
+            return key, self.surcharges[key]
+        matches = [label for label in self.surcharges if key in label]
+        if not matches:
+            raise KeyError(f"No {self.carrier} surcharge matching '{name}'")
+        label = min(matches, key=len)
+        return label, self.surcharges[label]
+
+    def service_names(self):
+        return sorted(table.service for table in self.tables.values())
+
+    def quote(self, service, zone, weight, surcharges=(), fuel_percent=None):
+        """Price one shipment. Percentage surcharges apply to the base rate.
+
+        A fuel_percent replaces any fuel surcharge from the guide, so fuel is
+        never charged twice.
+        """
+        table = self.find_table(service)
+        base = float(table.lookup([zone], [weight])[0])
+        if math.isnan(base):
+            raise ValueError(f"{table.service} has no rate for zone {zone} at {weight} lbs")
+        lines = []
+        for name in surcharges:
+            label, (kind, value) = self.find_surcharge(name)
+            if fuel_percent and "fuel" in label:
+                continue
+            amount = base * value / 100 if kind == "percent" else value
+            lines.append({"name": label, "type": kind, "value": value, "amount": round(amount, 2)})
+        if fuel_percent:
+            lines.append({"name": "fuel", "type": "percent", "value": fuel_percent, "amount": round(base * fuel_percent / 100, 2)})
+        total = base + sum(line["amount"] for line in lines)
+        return {
+            "carrier": self.carrier,
+            "service": table.service,
+            "zone": int(zone),
+            "billable_weight_lbs": math.ceil(weight),
+            "base_rate": round(base, 2),
+            "surcharges": lines,
+            "total": round(total, 2),
+        }
+
+    def quote_many(self, service, zones, weights):
+        """Vectorised base rates for many shipments of one service."""
+        return self.find_table(service).lookup(zones, weights)
@@ -0,0 +1,123 @@
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from rate_engine import normalise
+
+
+def lane_key(carrier, origin, destination):
+    """Cache key for a carrier lane. ZIPs are cut to their 3-digit prefix, like the zone charts."""
+    def place(text):
+        text = str(text).strip()
+        if re.fullmatch(r"\d{5}(-\d{4})?", text):
+            return text[:3]
+        return normalise(text)
+    return normalise(carrier), place(origin), place(destination)
+
+
+class RiskCache:
+    """Delay and disruption facts per (carrier, origin, destination), from web search.
+
+    `fetch(carrier, origin, destination)` does the actual search and returns
+    text. Entries are fresh for `ttl` seconds. For `stale_ttl` seconds more
+    the old answer is still returned immediately while one background
+    refresh runs. Past that the caller waits for a new search. A refresher
+    thread keeps the `top_lanes` most requested lanes fresh, so popular
+    routes never wait for a search. Only one search runs per lane at a time:
+    concurrent misses wait for the search already in flight.
+    """
+
+    def __init__(self, fetch, ttl=6 * 3600, stale_ttl=18 * 3600, top_lanes=20, refresh_interval=600, workers=2):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.top_lanes = top_lanes
+        self.refresh_interval = refresh_interval
+        self._entries = {}  # key -> (fetched_at, lane, facts)
+        self._inflight = {}  # key -> Future of the search running for that lane
+        self._requests = Counter()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="risk-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        if refresh_interval:
+            threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def get(self, carrier, origin, destination):
+        key = lane_key(carrier, origin, destination)
+        now = time.time()
+        with self._lock:
+            self._requests[key] += 1
+            entry = self._entries.get(key)
+            age = now - entry[0] if entry else None
+            if entry and age < self.ttl:
+                self.hits += 1
+                return entry[2]
+            if entry and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._schedule_refresh(key, entry[1])
+                return entry[2]
+            self.misses += 1
+            future, leader = self._claim(key)
+        if leader:
+            self._refresh(key, (carrier, origin, destination), future)
+        return future.result()
+
+    def _claim(self, key):
+        """(future, leader) for key's search, leader is True if the caller has to run it. Lock held."""
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = self._inflight[key] = Future()
+        return future, True
+
+    def _schedule_refresh(self, key, lane):
+        # Called with the lock held
+        future, leader = self._claim(key)
+        if leader:
+            self._executor.submit(self._refresh, key, lane, future)
+
+    def _refresh(self, key, lane, future):
+        started = time.perf_counter()
+        try:
+            facts = self.fetch(*lane)
+        except Exception as e:
+            logging.error(f"Risk refresh failed for {key}: {e}")
+            with self._lock:
+                del self._inflight[key]
+                entry = self._entries.get(key)
+            # Better an old answer than none
+            future.set_result(entry[2] if entry else "No delay information available.")
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), lane, facts)
+            del self._inflight[key]
+            self.refreshes += 1
+        future.set_result(facts)
+        logging.info(f"Refreshed delay risk for {key} in {time.perf_counter() - started:.1f}s")
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            now = time.time()
+            with self._lock:
+                for key, _ in self._requests.most_common(self.top_lanes):
+                    entry = self._entries.get(key)
+                    # Refresh before the next loop would find it expired
+                    if entry and now - entry[0] > self.ttl - self.refresh_interval:
+                        self._schedule_refresh(key, entry[1])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "lanes": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "top_lanes": [" / ".join(key) for key, _ in self._requests.most_common(5)],
+            }
@@ -0,0 +1,261 @@
+import re
+import math
+import json
+import time
+
+# "1,200" and "12,500.5" are thousands separators, any other comma is a decimal comma ("35,5")
+THOUSANDS = r"\d{1,3}(?:,\d{3})+(?![\d,])"
+NUMBER = r"(" + THOUSANDS + r"(?:\.\d+)?|\d+(?:[.,]\d+)?)"
+LENGTH_UNITS = r"(mm|cm|m|in|inch(?:es)?|\"|''|ft|feet|foot)"
+WEIGHT_UNITS = r"(kg|kgs|kilograms?|lbs?|pounds?|g|grams?|oz|ounces?)"
+DIMENSIONS_PATTERN = re.compile(
+    NUMBER + r"\s*" + LENGTH_UNITS + r"?\s*(?:x|×|\*|by)\s*"
+    + NUMBER + r"\s*" + LENGTH_UNITS + r"?\s*(?:x|×|\*|by)\s*"
+    + NUMBER + r"\s*" + LENGTH_UNITS + r"?",
+    re.I,
+)
+LABELLED_PATTERN = re.compile(r"\b(length|width|height|depth|diameter)\b[^\d\n]{0,20}" + NUMBER + r"\s*" + LENGTH_UNITS + r"?", re.I)
+WEIGHT_PATTERN = re.compile(NUMBER + r"\s*" + WEIGHT_UNITS + r"(?![a-z])", re.I)
+QUANTITY_PATTERN = re.compile(
+    r"\b(" + THOUSANDS + r"|\d+)\s*(?:x\s*)?(crates?|boxes|box|pallets?|packages?|pieces?|pcs|units?|cartons?|items?|cases?|parcels?)\b", re.I
+)
+QUANTITY_LABEL_PATTERN = re.compile(r"\b(?:quantity|qty)\b\W{0,5}(" + THOUSANDS + r"|\d+)", re.I)
+
+TO_INCHES = {"mm": 1 / 25.4, "cm": 1 / 2.54, "m": 100 / 2.54, "in": 1.0, "ft": 12.0}
+TO_POUNDS = {"kg": 2.20462, "lb": 1.0, "g": 0.00220462, "oz": 1 / 16}
+# Cubic inches per pound for domestic dim weight (2024 service guides)
+DIM_DIVISORS = {"UPS": 139, "FedEx": 139, "DHL": 139}
+# Standard 48 x 40 in pallet, stacked up to 72 in including the 6 in deck
+PALLET = {"length": 48.0, "width": 40.0, "deck_height": 6.0, "max_height": 72.0, "weight": 40.0, "max_weight": 2500.0}
+# Pieces heavier than this can't be hand-loaded and go on pallets
+PALLETISE_OVER_LBS = 150.0
+
+
+THOUSANDS_PATTERN = re.compile(THOUSANDS + r"(?:\.\d+)?")
+
+
+def _float(text):
+    if THOUSANDS_PATTERN.fullmatch(text):
+        return float(text.replace(",", ""))
+    return float(text.replace(",", "."))
+
+
+def _length_unit(text):
+    if not text:
+        return None
+    text = text.lower()
+    if text in ('"', "''") or text.startswith("inch"):
+        return "in"
+    if text in ("feet", "foot"):
+        return "ft"
+    return text
+
+
+def _weight_unit(text):
+    text = text.lower()
+    if text.startswith("k"):
+        return "kg"
+    if text.startswith(("lb", "pound")):
+        return "lb"
+    if text.startswith(("oz", "ounce")):
+        return "oz"
+    return "g"
+
+
+def parse_dimensions(text):
+    """(length, width, height) in inches and the assumptions made, or (None, [])."""
+    assumptions = []
+    match = DIMENSIONS_PATTERN.search(text)
+    if match:
+        values = [_float(match.group(i)) for i in (1, 3, 5)]
+        units = [_length_unit(match.group(i)) for i in (2, 4, 6)]
+        # "40 x 30 x 20 cm": one unit for all three
+        unit = next((u for u in reversed(units) if u), None)
+        if unit is None:
+            unit = "in"
+            assumptions.append("Dimensions had no unit, assumed inches")
+        dims = [value * TO_INCHES[u or unit] for value, u in zip(values, units)]
+        return tuple(dims), assumptions
+    labelled = {}
+    for name, value, unit in LABELLED_PATTERN.findall(text):
+        name = name.lower()
+        if name in labelled:
+            continue
+        unit = _length_unit(unit)
+        if unit is None:
+            unit = "in"
+            assumptions.append(f"{name.title()} had no unit, assumed inches")
+        labelled[name] = _float(value) * TO_INCHES[unit]
+    if "diameter" in labelled:
+        # Round items ship in a square box as wide as they are
+        labelled.setdefault("length", labelled["diameter"])
+        labelled.setdefault("width", labelled["diameter"])
+    if "depth" in labelled:
+        labelled.setdefault("length" if "width" in labelled else "width", labelled["depth"])
+    known = [labelled[name] for name in ("length", "width", "height") if name in labelled]
+    if len(known) >= 2:
+        if len(known) < 3:
+            assumptions.append("Only two dimensions given, assumed the longest for the missing side")
+        dims = [labelled.get(name, max(known)) for name in ("length", "width", "height")]
+        return tuple(dims), assumptions
+    return None, []
+
+
+def parse_weight(text):
+    """(pounds, is_total, assumptions) from the first weight mention, or (None, False, [])."""
+    match = WEIGHT_PATTERN.search(text)
+    if not match:
+        return None, False, []
+    pounds = _float(match.group(1)) * TO_POUNDS[_weight_unit(match.group(2))]
+    before = text[max(0, match.start() - 40):match.start()].lower()
+    is_total = "total" in before or "combined" in before
+    return pounds, is_total, []
+
+
+def parse_quantity(text):
+    match = QUANTITY_LABEL_PATTERN.search(text) or QUANTITY_PATTERN.search(text)
+    return max(int(match.group(1).replace(",", "")), 1) if match else 1
+
+
+def parse_shipment(text):
+    """Turn the 'User Question / Product Specifications' text into one normalised shipment.
+
+    Dimensions are in inches and weights in pounds, per piece.
+    """
+    assumptions = []
+    dims, notes = parse_dimensions(text)
+    assumptions += notes
+    weight, is_total, notes = parse_weight(text)
+    assumptions += notes
+    quantity = parse_quantity(text)
+    if dims is None:
+        assumptions.append("No dimensions found, dim weight not applied")
+    if weight is None:
+        assumptions.append("No weight found, billed on dim weight only")
+    elif is_total and quantity > 1:
+        weight /= quantity
+        assumptions.append(f"Total weight split evenly over {quantity} pieces")
+    return {
+        "quantity": quantity,
+        "length_in": round(dims[0], 2) if dims else None,
+        "width_in": round(dims[1], 2) if dims else None,
+        "height_in": round(dims[2], 2) if dims else None,
+        "weight_lbs": round(weight, 2) if weight is not None else None,
+        "assumptions": assumptions,
+    }
+
+
+def palletise(shipment):
+    """Pallet count and size for pieces that fit on a standard pallet, or None."""
+    dims = (shipment["length_in"], shipment["width_in"], shipment["height_in"])
+    if None in dims:
+        return None
+    length, width, height = dims
+    usable = PALLET["max_height"] - PALLET["deck_height"]
+    per_layer = max(
+        (PALLET["length"] // length) * (PALLET["width"] // width),
+        (PALLET["length"] // width) * (PALLET["width"] // length),
+    )
+    layers = usable // height
+    per_pallet = int(per_layer * layers)
+    if per_pallet == 0:
+        return None
+    if shipment["weight_lbs"]:
+        # The pallet's own weight counts towards its limit
+        per_pallet = min(per_pallet, max(int((PALLET["max_weight"] - PALLET["weight"]) // shipment["weight_lbs"]), 1))
+    pallets = math.ceil(shipment["quantity"] / per_pallet)
+    # Spread the pieces evenly, so every pallet has the same size and weight
+    pieces = math.ceil(shipment["quantity"] / pallets)
+    stack_height = PALLET["deck_height"] + math.ceil(pieces / per_layer) * height
+    return {
+        "pallets": pallets,
+        "pieces_per_pallet": pieces,
+        "pallet_dimensions_in": [PALLET["length"], PALLET["width"], round(stack_height, 1)],
+        "pallet_weight_lbs": round(pieces * (shipment["weight_lbs"] or 0) + PALLET["weight"], 1),
+    }
+
+
+def billable_weight(length, width, height, weight, divisor):
+    """Per-piece billable pounds: the larger of actual and dim weight, rounded up."""
+    dim_weight = math.ceil(length * width * height / divisor) if length else 0
+    return max(math.ceil(weight or 0), dim_weight), dim_weight
+
+
+def billable_weights(shipment, divisors=DIM_DIVISORS):
+    """Billable weight per carrier, for parcels and (if palletised) for the pallets."""
+    pallet = None
+    if (shipment["weight_lbs"] or 0) > PALLETISE_OVER_LBS or shipment["quantity"] > 1:
+        pallet = palletise(shipment)
+    result = {}
+    for carrier, divisor in divisors.items():
+        piece, dim_weight = billable_weight(
+            shipment["length_in"], shipment["width_in"], shipment["height_in"], shipment["weight_lbs"], divisor
+        )
+        entry = {
+            "divisor": divisor,
+            "dim_weight_lbs_per_piece": dim_weight,
+            "billable_lbs_per_piece": piece,
+            "billable_lbs_total": piece * shipment["quantity"],
+        }
+        if pallet:
+            per_pallet, _ = billable_weight(*pallet["pallet_dimensions_in"], pallet["pallet_weight_lbs"], divisor)
+            entry["billable_lbs_palletised"] = per_pallet * pallet["pallets"]
+        result[carrier] = entry
+    return result, pallet
+
+
+def normalise(text):
+    shipment = parse_shipment(text)
+    carriers, pallet = billable_weights(shipment)
+    return {**shipment, "palletised": pallet, "carriers": carriers}
+
+
+def normalise_shipment(specification: str) -> str:
+    """Parse weight, dimensions and quantity from the shipment text and compute billable weight per carrier.
+
+    Args:
+        specification (str): The 'User Question' and 'Product Specifications' text.
+
+    Returns:
+        str: JSON with per-piece inches/pounds, quantity, pallet layout if palletised,
+            and per-carrier dim weight and billable weight. Use these numbers as-is.
+    """
+    return json.dumps(normalise(specification))
+
+
+SAMPLE_SHIPMENTS = [
+    "User Question: Ship 3 crates of machine parts from Chicago, IL (60601) to Atlanta, GA (30301). Each crate is about 200 lbs.\n"
+    "Product Specifications: Wooden crate, dimensions 48 x 40 x 36 in, material pine.",
+    "User Question: Denver, CO (80202) to Phoenix, AZ (85001).\n"
+    "Product Specifications: Office chair. Dimensions: Length: 65 cm, Width: 60 cm, Height: 110 cm. Weight: 14 kg. Material: mesh and steel.",
+    "User Question: 10 boxes from 10001 to 94105, total weight 120 kg.\n"
+    "Product Specifications: Cardboard box 40x30x25 cm containing ceramic mugs.",
+    "User Question: One package 90210 to 60601.\n"
+    "Product Specifications: Laptop, 35.5 × 24 × 2 cm, 1.8 kg, aluminium.",
+    "User Question: Quantity: 24 cartons, Miami to Dallas.\n"
+    "Product Specifications: Carton 18\" x 12\" x 10\", 22 lbs each.",
+    "User Question: Ship this lamp to Boston.\n"
+    "Product Specifications: Floor lamp, height 160 cm, diameter 30 cm, weight 6.5 kg.",
+    "User Question: 2 packages from Houston, TX (77001) to Memphis, TN (38103). Each package weighs 1,200 lbs.\n"
+    "Product Specifications: Industrial generator, 1,200 x 800 x 600 mm, steel housing.",
+    "User Question: Quantity: 1,500 units, Newark to Chicago, total weight 2,250.5 kg.\n"
+    "Product Specifications: Phone case 16,5 x 8,5 x 1,5 cm, silicone.",
+]
+
+
+def benchmark(rounds=2000):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in SAMPLE_SHIPMENTS:
+            normalise(text)
+    elapsed = time.perf_counter() - started
+    count = rounds * len(SAMPLE_SHIPMENTS)
+    print(f"{count} shipments in {elapsed:.3f}s -> {elapsed / count * 1e6:.1f} us/shipment")
+
+
+if __name__ == "__main__":
+    # python shipment_normaliser.py  prints the sample results and times the parser
+    for text in SAMPLE_SHIPMENTS:
+        print(text.splitlines()[0])
+        print(json.dumps(normalise(text), indent=2))
+    benchmark()
@@ -0,0 +1,138 @@
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # perceptual matching is optional
+    PILImage = None
+
+
+def image_sha256(image_data):
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def perceptual_hash(image_data, size=8):
+    """64-bit difference hash, stable across re-encoding and resizing. None without Pillow."""
+    if PILImage is None:
+        return None
+    try:
+        image = PILImage.open(io.BytesIO(image_data)).convert("L").resize((size + 1, size))
+    except Exception:
+        return None
+    pixels = list(image.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+class VisionCache:
+    """Disk cache of product specifications, keyed by image content.
+
+    Entries are small JSON files named by the image's SHA-256. Hits touch the
+    file, and when the directory grows past `max_bytes` the least recently
+    used entries are deleted. With `max_distance` set and Pillow installed, a
+    near-identical image (perceptual hash within that many bits) also counts
+    as a hit, which catches the same photo resent after WhatsApp
+    re-compressed it. It's off by default: look-alike catalogue shots on a
+    white background can be that close too and would get another product's
+    specification.
+    """
+
+    def __init__(self, directory="vision_cache", max_bytes=50 * 1024 * 1024, max_distance=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # sha256 -> perceptual hash, for near-duplicate lookups
+        self._phashes = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(directory, name)) as f:
+                        entry = json.load(f)
+                    if entry.get("phash") is not None:
+                        self._phashes[name[:-5]] = entry["phash"]
+                except (OSError, ValueError):
+                    continue
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return entry["specification"]
+
+    def get(self, image_data):
+        """Return the cached specification for image_data, or None."""
+        key = image_sha256(image_data)
+        with self._lock:
+            specification = self._read(key)
+            if specification is not None:
+                self.hits += 1
+                return specification
+            phash = perceptual_hash(image_data) if self.max_distance is not None and self._phashes else None
+            if phash is not None:
+                for other_key, other_phash in list(self._phashes.items()):
+                    if bin(phash ^ other_phash).count("1") <= self.max_distance:
+                        specification = self._read(other_key)
+                        if specification is not None:
+                            self.perceptual_hits += 1
+                            logging.info(f"Vision cache near-duplicate hit {key[:12]} ~ {other_key[:12]}")
+                            return specification
+            self.misses += 1
+            return None
+
+    def put(self, image_data, specification):
+        key = image_sha256(image_data)
+        phash = perceptual_hash(image_data)
+        entry = {"specification": specification, "phash": phash, "created_at": time.time()}
+        with self._lock:
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+            if phash is not None:
+                self._phashes[key] = phash
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, name = entries.pop(0)
+            os.remove(os.path.join(self.directory, name))
+            self._phashes.pop(name[:-5], None)
+            total -= size
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "perceptual_hits": self.perceptual_hits,
+            "misses": self.misses,
+        }
@@ -2,11 +2,14 @@ import os
 import re
 import json
 import logging
+import time
 import requests
 from time import sleep
 from dotenv import load_dotenv
-from freight_agent import full_response
-from agent_service import get_response
+from freight_agent import stream_response
+from agent_service import get_specification, freight_prompt
+from message_chunks import SectionChunker, split_long
+from graph_client import GraphClient
 from fastapi.responses import JSONResponse
 
 load_dotenv()
@@ -15,6 +18,9 @@ WHATSAPP_ACCESS_TOKEN = os.getenv('WHATSAPP_ACCESS_TOKEN')
 VERSION = os.getenv('VERSION')
 PHONE_NUMBER_ID = os.getenv('PHONE_NUMBER_ID')
 
+# Shared by every Graph API call in the service
+graph = GraphClient(WHATSAPP_ACCESS_TOKEN, VERSION, PHONE_NUMBER_ID)
+
 def log_http_response(response):
     logging.info(f"Status: {response.status_code}")
     logging.info(f"Content-type: {response.headers.get('content-type')}")
@@ -37,14 +43,8 @@ def generate_response(message):
 
 
 def send_message(data):
-    headers = {
-        "Content-type": "application/json",
-        "Authorization": f"Bearer {WHATSAPP_ACCESS_TOKEN}",
-    }
-    url = f"https://graph.facebook.com/{VERSION}/{PHONE_NUMBER_ID}/messages"
-
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=10)
+        response = graph.send_message(data)
         response.raise_for_status()
         log_http_response(response)
         return response
@@ -77,21 +77,34 @@ def process_whatsapp_message(body: dict):
     elif message["type"] == "image":
         message_body = message["image"]
         id = message_body.get("id")
-        headers = {
-            "Content-type": "application/json",
-            "Authorization": f"Bearer {WHATSAPP_ACCESS_TOKEN}",
-        }
-        metadata_res = requests.get(f"https://graph.facebook.com/{VERSION}/{id}", headers=headers)
-        image_url = metadata_res.json().get("url")
-        image_res = requests.get(image_url, headers={"Authorization": f"Bearer {WHATSAPP_ACCESS_TOKEN}"})
-        with open(f"images/{id}.jpg", "wb") as f:
-            f.write(image_res.content)
+        graph.download_media(id, f"images/{id}.jpg")
         if message_body.get("caption"):
             message_body = {'image_path': f'images/{id}.jpg', 'caption': message_body.get("caption")}
         else:
             message_body = {'image_path': f'images/{id}.jpg', 'caption': ''}
-    response_text = get_response(message_body)
-    full_text = full_response(response_text)
-    data = get_text_message_input(wa_id, full_text)
-    send_message(data)
+    started = time.perf_counter()
+    first_sent = None
+
+    def send_text(text):
+        nonlocal first_sent
+        send_message(get_text_message_input(wa_id, text))
+        if first_sent is None:
+            first_sent = time.perf_counter() - started
+            logging.info(f"Time to first message for {wa_id}: {first_sent:.2f}s")
+
+    question, specification = get_specification(message_body)
+    # Acknowledge the product right away, the quote takes a while
+    for text in split_long(f"📦 Product received:\n{specification}\n\nPreparing your freight quote..."):
+        send_text(text)
+
+    chunker = SectionChunker()
+    sent = 0
+    for delta in stream_response(freight_prompt(question, specification)):
+        for text in chunker.feed(delta):
+            send_text(text)
+            sent += 1
+    for text in chunker.flush():
+        send_text(text)
+        sent += 1
+    logging.info(f"Sent freight answer to {wa_id} in {sent} messages, {time.perf_counter() - started:.2f}s total")
 
@@ -0,0 +1,143 @@
+import os
+import re
+import sys
+import json
+import glob
+import time
+import logging
+import numpy as np
+from rate_engine import split_cells, is_separator, normalise
+
+ORIGIN_PATTERN = re.compile(r"origin\w*\D{0,40}?(\d{3})(?:\d{2})?(?:\s*(?:-|–|to)\s*(\d{3})(?:\d{2})?)?", re.I)
+RANGE_PATTERN = re.compile(r"^(\d{3})(?:\d{2})?(?:\s*(?:-|–)\s*(\d{3})(?:\d{2})?)?")
+PREFIXES = 1000
+# 0 means "no zone", real zones go up to the 1xx/2xx air zones
+NO_ZONE = 0
+
+
+def _range(text):
+    match = RANGE_PATTERN.match(text.replace("*", "").strip())
+    if not match:
+        return None
+    low = int(match.group(1))
+    high = int(match.group(2)) if match.group(2) else low
+    return low, high
+
+
+def parse_zone_charts(markdown):
+    """Return (service, origin_low, origin_high, dest_low, dest_high, zone) rows.
+
+    A zone chart is a pipe table whose first header cell mentions ZIP, with
+    one column per service. The origin range comes from the closest
+    "originating in ZIP codes 800-803" style line above the table.
+    """
+    entries = []
+    origin = None
+    header = None
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        if not stripped.startswith("|"):
+            header = None
+            match = ORIGIN_PATTERN.search(stripped)
+            if match:
+                origin = (int(match.group(1)), int(match.group(2) or match.group(1)))
+            continue
+        if is_separator(stripped):
+            continue
+        cells = split_cells(stripped)
+        if header is None:
+            header = cells if "zip" in cells[0].lower() else []
+            continue
+        if not header or origin is None:
+            continue
+        destination = _range(cells[0])
+        if destination is None:
+            continue
+        for service, cell in zip(header[1:], cells[1:]):
+            zone = re.sub(r"\D", "", cell)
+            if service and zone:
+                entries.append((normalise(service), origin[0], origin[1], destination[0], destination[1], int(zone)))
+    return entries
+
+
+def build_index(markdown_paths, index_path):
+    """Parse the zone charts and write a services x origin x destination prefix array."""
+    entries = []
+    for path in markdown_paths:
+        with open(path) as f:
+            entries.extend(parse_zone_charts(f.read()))
+    services = sorted({entry[0] for entry in entries})
+    zones = np.full((len(services), PREFIXES, PREFIXES), NO_ZONE, dtype=np.uint16)
+    positions = {service: i for i, service in enumerate(services)}
+    for service, origin_low, origin_high, dest_low, dest_high, zone in entries:
+        zones[positions[service], origin_low:origin_high + 1, dest_low:dest_high + 1] = zone
+    np.save(index_path, zones)
+    with open(index_path + ".json", "w") as f:
+        json.dump({"services": services, "sources": list(markdown_paths)}, f)
+    logging.info(f"Built zone index for {len(services)} services from {len(entries)} chart rows")
+    return index_path
+
+
+class ZoneIndex:
+    """ZIP -> zone lookups on a memory-mapped services x 1000 x 1000 uint16 array.
+
+    Zones are charted by 3-digit ZIP prefix, so a lookup is two integer
+    conversions and one array read. The array is opened with mmap: pages
+    are only read from disk when first used, and shared between workers.
+    """
+
+    def __init__(self, index_path):
+        with open(index_path + ".json") as f:
+            self.services = json.load(f)["services"]
+        self._positions = {service: i for i, service in enumerate(self.services)}
+        self.zones = np.load(index_path, mmap_mode="r")
+
+    @classmethod
+    def load_or_build(cls, markdown_paths, index_path):
+        """Load the index, rebuilding it first if any source markdown is newer."""
+        if not os.path.exists(index_path) or any(
+            os.path.getmtime(path) > os.path.getmtime(index_path) for path in markdown_paths
+        ):
+            build_index(markdown_paths, index_path)
+        return cls(index_path)
+
+    def service_position(self, service):
+        key = normalise(service)
+        if key in self._positions:
+            return self._positions[key]
+        matches = [name for name in self.services if key in name]
+        if not matches:
+            raise KeyError(f"No zone chart for '{service}'. Known services: {self.services}")
+        return self._positions[min(matches, key=len)]
+
+    def lookup(self, origin_zip, destination_zip, service="ground"):
+        """Zone for a lane, or None if the charts don't cover it."""
+        # zfill: ZIPs passed as ints lose their leading zeros
+        origin = int(str(origin_zip).strip().zfill(5)[:3])
+        destination = int(str(destination_zip).strip().zfill(5)[:3])
+        zone = int(self.zones[self.service_position(service), origin, destination])
+        return None if zone == NO_ZONE else zone
+
+
+def benchmark(index, lookups=100000):
+    rng = np.random.default_rng(0)
+    lanes = [(f"{o:03d}01", f"{d:03d}01") for o, d in rng.integers(0, PREFIXES, size=(lookups, 2))]
+    service = index.services[0]
+    started = time.perf_counter()
+    for origin, destination in lanes:
+        index.lookup(origin, destination, service)
+    elapsed = time.perf_counter() - started
+    print(f"{lookups} lookups in {elapsed:.3f}s -> {elapsed / lookups * 1e6:.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    # python zone_index.py [markdown files...]  rebuilds the index and times lookups
+    paths = sys.argv[1:] or sorted(glob.glob("Markdown/*.md") + glob.glob("Document/*.md"))
+    started = time.perf_counter()
+    build_index(paths, "Document/zone_index.npy")
+    print(f"Built index from {len(paths)} files in {time.perf_counter() - started:.3f}s")
+    started = time.perf_counter()
+    index = ZoneIndex("Document/zone_index.npy")
+    print(f"Loaded index in {(time.perf_counter() - started) * 1000:.2f} ms, services: {index.services}")
+    if index.services:
+        benchmark(index)
@@ -0,0 +1,5 @@
+"""Local stand-ins for the model providers, to run and time the agents offline."""
+from .fake_model import FakeModel, chat_model, fake_reply
+from .fake_embedder import FakeEmbedder, text_embedder
+
+__all__ = ["FakeModel", "chat_model", "fake_reply", "FakeEmbedder", "text_embedder"]
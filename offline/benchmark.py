@@ -0,0 +1,134 @@
+"""Time each stage of the agent pipelines with local stand-ins, no network needed.
+
+    python -m offline.benchmark [pdf ...] [--latency 0.5] [--embed-latency 0.05] [--rounds 3]
+
+OCR uses the PDF text layer instead of Mistral, every agent gets a
+FakeModel and knowledge chunks a FakeEmbedder, so the numbers are our own
+overhead plus the simulated latency. Knowledge ingestion is timed up to
+the embeddings, the PgVector insert is left out. Without a PDF a generated
+rate-guide-like sample is used.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+# rate_engine is a freight-agent module, the shared packages come from PYTHONPATH (see README.md)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "freight-agent"))
+
+from agno.agent import Agent
+from agno.knowledge.markdown import MarkdownKnowledgeBase
+from document_ocr import OCRCache, OCRPipeline, ocr_pdf
+from rate_engine import RateEngine
+from vector_store import markdown_sources
+from offline.fake_model import FakeModel
+from offline.fake_embedder import FakeEmbedder
+
+
+def _pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_sample_pdf(path, pages=30):
+    """Write a small text PDF with a UPS-style rate table on every page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = [f"# Ground page {page + 1}", "| Weight | Zone 2 | Zone 3 | Zone 4 | Zone 5 |", "| --- | --- | --- | --- | --- |"]
+        for weight in range(1, 31):
+            base = 10 + weight * 0.9 + page
+            lines.append(f"| {weight} | ${base:.2f} | ${base + 1.1:.2f} | ${base + 2.3:.2f} | ${base + 3.6:.2f} |")
+        stream = "BT /F1 8 Tf 40 800 Td 10 TL " + " ".join(f"({_pdf_text(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def timed(timings, stage, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings.setdefault(stage, []).append(time.perf_counter() - started)
+    return result
+
+
+def embed_knowledge(path, embedder):
+    """Chunk the markdown under path like the agents' knowledge bases do and embed every chunk."""
+    knowledge = MarkdownKnowledgeBase(path=markdown_sources(path))
+    chunks = 0
+    for documents in knowledge.document_lists:
+        for document in documents:
+            document.embed(embedder)
+            chunks += 1
+    return chunks
+
+
+def run_pipelines(pdf_path, workdir, timings, latency, embed_latency):
+    # A fresh cache each round, so the cold OCR really is cold
+    cache = OCRCache(tempfile.mkdtemp(dir=workdir))
+    markdown_dir = tempfile.mkdtemp(dir=workdir)
+    markdown_path = os.path.join(markdown_dir, "document.md")
+    timed(timings, "ocr text layer (cold)", ocr_pdf, pdf_path, markdown_path, pipeline=OCRPipeline(cache=cache, backend="text"))
+    timed(timings, "ocr text layer (cached)", ocr_pdf, pdf_path, markdown_path, pipeline=OCRPipeline(cache=cache, backend="text"))
+    with open(markdown_path) as f:
+        markdown = f.read()
+
+    # freight-agent: rate tables are parsed from the OCR'd guide at startup
+    timed(timings, "freight rate table parse", RateEngine.from_markdown, markdown)
+    # freight-agent: the OCR'd guide is chunked and embedded into the freight knowledge base
+    timed(timings, "freight KB chunk + embed", embed_knowledge, markdown_dir, FakeEmbedder(latency=embed_latency))
+
+    # ImportExportRegulationAgent: the law document goes through the translation agent
+    translation_agent = Agent(name="Translation Agent", model=FakeModel(latency=latency), instructions="Translate the document to English.")
+    timed(timings, "import/export translation", translation_agent.run, markdown)
+
+    # advanced-research-assistant: summary of the OCR'd paper
+    summary_agent = Agent(
+        name="Summary Agent",
+        model=FakeModel(latency=latency),
+        instructions="Summarize the document.",
+        additional_context=markdown,
+    )
+    timed(timings, "research summary", summary_agent.run, "Summarize the document")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdfs", nargs="*", help="PDFs to run through the pipelines")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency in seconds")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="fake embedding latency per chunk in seconds")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=30, help="pages of the generated sample PDF")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pdfs = args.pdfs or [make_sample_pdf(os.path.join(workdir, "sample.pdf"), args.pages)]
+        for pdf_path in pdfs:
+            timings = {}
+            started = time.perf_counter()
+            for _ in range(args.rounds):
+                run_pipelines(pdf_path, workdir, timings, args.latency, args.embed_latency)
+            total = time.perf_counter() - started
+            print(f"\n{os.path.basename(pdf_path)}: {args.rounds} rounds in {total:.2f}s (fake latency {args.latency}s)")
+            print(f"{'stage':<30}{'median ms':>12}{'min ms':>12}")
+            for stage, seconds in timings.items():
+                print(f"{stage:<30}{statistics.median(seconds) * 1000:>12.1f}{min(seconds) * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import re
+import math
+import time
+import hashlib
+from dataclasses import dataclass
+from agno.embedder.base import Embedder
+
+
+@dataclass
+class FakeEmbedder(Embedder):
+    """Offline agno embedder: hashed bag of words, same text -> same vector.
+
+    Every word is hashed to one of `dimensions` slots with a +/-1 sign and
+    the vector is L2-normalised, so texts sharing words still land close
+    together under cosine distance. Each call waits `latency` seconds to
+    stand in for the embedding API round-trip.
+    """
+
+    dimensions: int = 1536
+    latency: float = 0.0
+
+    def get_embedding(self, text):
+        time.sleep(self.latency)
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            slot = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[slot] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def get_embedding_and_usage(self, text):
+        return self.get_embedding(text), None
+
+
+def text_embedder(embedder=None):
+    """`embedder`, or a FakeEmbedder in its place when FAKE_MODEL=1.
+
+    None stays None, which leaves the vector db on its default (OpenAI)
+    embedder. FAKE_EMBEDDER_LATENCY (seconds per call) sets the fake's speed.
+    """
+    if os.getenv("FAKE_MODEL", "0") != "1":
+        return embedder
+    return FakeEmbedder(latency=float(os.getenv("FAKE_EMBEDDER_LATENCY", "0")))
@@ -0,0 +1,87 @@
+import os
+import time
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+WORDS = (
+    "shipment rate zone carrier customs tariff document page summary regulation "
+    "export import delivery surcharge weight compliance estimate section clause"
+).split()
+
+
+def fake_reply(prompt, words=120):
+    """Deterministic text for a prompt: same prompt, same reply, no network."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    body = " ".join(WORDS[digest[i % len(digest)] % len(WORDS)] for i in range(words))
+    return f"[fake reply {digest.hex()[:12]}]\n\n{body}"
+
+
+@dataclass
+class FakeModel(Model):
+    """Offline agno model that answers every prompt with fake_reply().
+
+    It waits `latency` seconds before answering and streams at
+    `tokens_per_second` words per second (0 means all at once), so agent and
+    pipeline overhead can be timed without any model provider. It never
+    calls tools.
+    """
+
+    id: str = "fake-model"
+    name: str = "FakeModel"
+    provider: str = "Offline"
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    reply_words: int = 120
+
+    def _reply(self, messages):
+        prompt = next((str(message.content) for message in reversed(messages) if message.role == "user"), "")
+        return fake_reply(prompt, self.reply_words)
+
+    def _pieces(self, reply):
+        return [word + " " for word in reply.split(" ")] if self.tokens_per_second else [reply]
+
+    def invoke(self, messages=None, **kwargs):
+        time.sleep(self.latency)
+        return self._reply(messages or [])
+
+    async def ainvoke(self, messages=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._reply(messages or [])
+
+    def invoke_stream(self, messages=None, **kwargs):
+        time.sleep(self.latency)
+        for piece in self._pieces(self._reply(messages or [])):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield piece
+
+    async def ainvoke_stream(self, messages=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for piece in self._pieces(self._reply(messages or [])):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield piece
+
+    def parse_provider_response(self, response, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+    def parse_provider_response_delta(self, response):
+        return ModelResponse(role="assistant", content=response)
+
+
+def chat_model(model):
+    """`model`, or a FakeModel in its place when FAKE_MODEL=1.
+
+    FAKE_MODEL_LATENCY (seconds) and FAKE_MODEL_TPS (words per second) set
+    the fake's speed.
+    """
+    if os.getenv("FAKE_MODEL", "0") != "1":
+        return model
+    return FakeModel(
+        id=f"fake-{model.id}",
+        latency=float(os.getenv("FAKE_MODEL_LATENCY", "0")),
+        tokens_per_second=float(os.getenv("FAKE_MODEL_TPS", "0")),
+    )
@@ -0,0 +1,9 @@
+"""One PgVector table per agent, with per-document metadata and tunable ANN indexes."""
+from .collections import (
+    DB_URL, create_indexes, document_filter, load_knowledge, markdown_sources, namespaced_knowledge, namespaced_vector_db, vector_index
+)
+
+__all__ = [
+    "DB_URL", "create_indexes", "document_filter", "load_knowledge", "markdown_sources",
+    "namespaced_knowledge", "namespaced_vector_db", "vector_index",
+]
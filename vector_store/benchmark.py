@@ -0,0 +1,132 @@
+"""Recall and latency of namespace-filtered PgVector search, per index setting.
+
+    python -m vector_store.benchmark [--rows 20000] [--dim 256] [--queries 100] [--k 5]
+
+Loads synthetic clustered vectors spread over a few namespaces into a
+scratch table, computes the exact top-k per namespace with numpy, then
+builds each HNSW / IVFFlat index and measures recall@k and query latency
+for the search settings (ef_search / probes). Needs the pgvector Postgres
+at PGVECTOR_DB_URL.
+"""
+import json
+import time
+import argparse
+import numpy as np
+from sqlalchemy import create_engine, text
+from .collections import DB_URL
+
+TABLE = "ai.kb_benchmark"
+INDEXES = [
+    ("hnsw m=16 ef_construction=64", "hnsw", {"m": 16, "ef_construction": 64}, "hnsw.ef_search", [10, 40, 100]),
+    ("hnsw m=16 ef_construction=200", "hnsw", {"m": 16, "ef_construction": 200}, "hnsw.ef_search", [10, 40, 100]),
+    ("ivfflat lists=100", "ivfflat", {"lists": 100}, "ivfflat.probes", [1, 10, 20]),
+]
+
+
+def vector_literal(vector):
+    return "[" + ",".join(f"{value:.6f}" for value in vector) + "]"
+
+
+def make_data(rows, dim, namespaces, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dim))
+    vectors = centers[rng.integers(0, len(centers), rows)] + rng.normal(scale=0.6, size=(rows, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    labels = rng.integers(0, namespaces, rows)
+    return vectors.astype(np.float32), labels
+
+
+def exact_top_k(vectors, labels, query, namespace, k):
+    candidates = np.flatnonzero(labels == namespace)
+    scores = vectors[candidates] @ query
+    return set(candidates[np.argsort(-scores)[:k]].tolist())
+
+
+def load(engine, vectors, labels):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS ai"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(f"CREATE TABLE {TABLE} (id integer PRIMARY KEY, meta_data jsonb, embedding vector({vectors.shape[1]}))"))
+        rows = [
+            {"id": i, "meta_data": json.dumps({"agent": f"agent_{label}"}), "embedding": vector_literal(vector)}
+            for i, (vector, label) in enumerate(zip(vectors, labels))
+        ]
+        for start in range(0, len(rows), 1000):
+            conn.execute(text(f"INSERT INTO {TABLE} VALUES (:id, CAST(:meta_data AS jsonb), CAST(:embedding AS vector))"), rows[start:start + 1000])
+        # The namespace filter is a jsonb containment check, GIN makes it an index lookup
+        conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin (meta_data)"))
+        conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def search(engine, queries, setting, value, k):
+    results = []
+    latencies = []
+    with engine.connect() as conn:
+        for query, namespace in queries:
+            with conn.begin():
+                if setting:
+                    conn.execute(text(f"SET LOCAL {setting} = {value}"))
+                else:
+                    # Exact baseline: sequential scan
+                    conn.execute(text("SET LOCAL enable_indexscan = off"))
+                started = time.perf_counter()
+                rows = conn.execute(
+                    text(f"SELECT id FROM {TABLE} WHERE meta_data @> CAST(:filters AS jsonb) ORDER BY embedding <=> CAST(:query AS vector) LIMIT :k"),
+                    {"filters": json.dumps({"agent": f"agent_{namespace}"}), "query": vector_literal(query), "k": k},
+                ).fetchall()
+                latencies.append(time.perf_counter() - started)
+            results.append({row[0] for row in rows})
+    return results, latencies
+
+
+def report(name, results, truth, latencies, k):
+    recall = np.mean([len(found & expected) / k for found, expected in zip(results, truth)])
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<48}{recall:>8.3f}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--namespaces", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--db-url", default=DB_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_url)
+    vectors, labels = make_data(args.rows, args.dim, args.namespaces)
+    started = time.perf_counter()
+    load(engine, vectors, labels)
+    print(f"Loaded {args.rows} x {args.dim} vectors in {time.perf_counter() - started:.1f}s")
+
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, args.rows, args.queries)
+    queries = []
+    for pick in picks:
+        query = vectors[pick] + rng.normal(scale=0.05, size=args.dim).astype(np.float32)
+        queries.append((query / np.linalg.norm(query), int(labels[pick])))
+    truth = [exact_top_k(vectors, labels, query, namespace, args.k) for query, namespace in queries]
+
+    print(f"{'index / search setting':<48}{'recall@' + str(args.k):>8}{'p50 ms':>10}{'p95 ms':>10}")
+    results, latencies = search(engine, queries, None, None, args.k)
+    report("exact (no ANN index)", results, truth, latencies, args.k)
+    for name, kind, options, setting, values in INDEXES:
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ai.kb_benchmark_ann"))
+            started = time.perf_counter()
+            with_options = ", ".join(f"{key} = {value}" for key, value in options.items())
+            conn.execute(text(f"CREATE INDEX kb_benchmark_ann ON {TABLE} USING {kind} (embedding vector_cosine_ops) WITH ({with_options})"))
+        print(f"-- built {name} in {time.perf_counter() - started:.1f}s")
+        for value in values:
+            results, latencies = search(engine, queries, setting, value, args.k)
+            report(f"{name}, {setting}={value}", results, truth, latencies, args.k)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import re
+import hashlib
+from pathlib import Path
+from sqlalchemy import text
+from agno.vectordb.pgvector import PgVector, HNSW, Ivfflat
+from agno.knowledge.markdown import MarkdownKnowledgeBase
+from offline import FakeEmbedder, text_embedder
+
+DB_URL = os.getenv("PGVECTOR_DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+
+
+def vector_index(kind=None):
+    """ANN index from the environment: PGVECTOR_INDEX=hnsw (default) or ivfflat.
+
+    HNSW: PGVECTOR_HNSW_M, PGVECTOR_HNSW_EF_CONSTRUCTION, PGVECTOR_HNSW_EF_SEARCH.
+    IVFFlat: PGVECTOR_IVFFLAT_LISTS (sized from the row count when unset),
+    PGVECTOR_IVFFLAT_PROBES.
+    """
+    kind = (kind or os.getenv("PGVECTOR_INDEX", "hnsw")).lower()
+    if kind == "hnsw":
+        return HNSW(
+            m=int(os.getenv("PGVECTOR_HNSW_M", "16")),
+            ef_construction=int(os.getenv("PGVECTOR_HNSW_EF_CONSTRUCTION", "200")),
+            # agno's default of 5 is below the number of chunks we fetch, which caps recall
+            ef_search=int(os.getenv("PGVECTOR_HNSW_EF_SEARCH", "40")),
+        )
+    if kind == "ivfflat":
+        lists = os.getenv("PGVECTOR_IVFFLAT_LISTS")
+        return Ivfflat(
+            # Unset: agno sizes lists from the row count when the index is built
+            lists=int(lists) if lists else 100,
+            dynamic_lists=not lists,
+            probes=int(os.getenv("PGVECTOR_IVFFLAT_PROBES", "10")),
+        )
+    raise ValueError(f"Unknown vector index '{kind}', use hnsw or ivfflat")
+
+
+def table_name(namespace):
+    return "kb_" + re.sub(r"[^a-z0-9]+", "_", namespace.lower()).strip("_")
+
+
+def namespaced_vector_db(namespace, db_url=None, index=None, embedder=None):
+    """PgVector on the namespace's own table, so a recreate only wipes this agent's chunks.
+
+    With FAKE_MODEL=1 chunks are embedded by the offline FakeEmbedder into a
+    separate `_offline` table, so fake vectors never mix with real ones.
+    """
+    embedder = text_embedder(embedder)
+    table = table_name(namespace) + ("_offline" if isinstance(embedder, FakeEmbedder) else "")
+    return PgVector(table_name=table, db_url=db_url or DB_URL, vector_index=index or vector_index(), embedder=embedder)
+
+
+def document_filter(path):
+    """Metadata every chunk of the markdown file at path is stored with.
+
+    Passed as an agent's knowledge_filters it becomes a `meta_data @> ...`
+    clause in the search SQL. The version is a content hash, so a file that
+    was overwritten (a new OCR'd upload) doesn't match its old chunks.
+    """
+    with open(path, "rb") as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return {"document": Path(path).stem, "version": version}
+
+
+def markdown_sources(path):
+    """[{"path", "metadata"}] for a markdown file, or every .md file under a folder."""
+    path = Path(path)
+    files = sorted(path.glob("**/*.md")) if path.is_dir() else [path] if path.exists() else []
+    return [{"path": str(file), "metadata": document_filter(file)} for file in files]
+
+
+def namespaced_knowledge(namespace, path, db_url=None, index=None, embedder=None, **kwargs):
+    """MarkdownKnowledgeBase over path, stored in the namespace's table with per-document metadata."""
+    return MarkdownKnowledgeBase(
+        path=markdown_sources(path),
+        vector_db=namespaced_vector_db(namespace, db_url, index, embedder),
+        **kwargs
+    )
+
+
+def create_indexes(vector_db, force_recreate=None):
+    """Build the table's ANN index, agno's full-text index and a GIN index on meta_data.
+
+    agno only creates the HNSW / IVFFlat index in optimize(), which load()
+    never calls, so without this every search is a sequential scan and the
+    index settings do nothing. The meta_data index turns the knowledge_filters
+    `@>` clause into an index lookup. Existing indexes are kept, set
+    PGVECTOR_REINDEX=1 (or force_recreate) to rebuild them after changing the
+    index parameters.
+    """
+    if force_recreate is None:
+        force_recreate = os.getenv("PGVECTOR_REINDEX", "0") == "1"
+    vector_db.optimize(force_recreate=force_recreate)
+    with vector_db.Session() as sess, sess.begin():
+        sess.execute(text(
+            f'CREATE INDEX IF NOT EXISTS "{vector_db.table_name}_meta_data_gin_index" '
+            f"ON {vector_db.table.fullname} USING GIN (meta_data)"
+        ))
+
+
+def load_knowledge(knowledge, recreate=False, **kwargs):
+    """knowledge.load(), then create_indexes() once the rows are in (IVFFlat sizes its lists from them)."""
+    knowledge.load(recreate=recreate, **kwargs)
+    create_indexes(knowledge.vector_db)